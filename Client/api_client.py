@@ -0,0 +1,328 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from Experiments.normalize import normalize_query
+
+API_BASE_URL = os.getenv("RECOMMENDER_API_URL", "http://localhost:8000")
+CLIENT_TIMEOUT = float(os.getenv("RECOMMENDER_CLIENT_TIMEOUT", "30"))
+CLIENT_CONNECT_TIMEOUT = float(os.getenv("RECOMMENDER_CLIENT_CONNECT_TIMEOUT", "5"))
+CLIENT_RETRIES = int(os.getenv("RECOMMENDER_CLIENT_RETRIES", "3"))
+CLIENT_BACKOFF = float(os.getenv("RECOMMENDER_CLIENT_BACKOFF", "0.5"))
+CLIENT_POOL_SIZE = int(os.getenv("RECOMMENDER_CLIENT_POOL_SIZE", "10"))
+CLIENT_CACHE_SIZE = int(os.getenv("RECOMMENDER_CLIENT_CACHE_SIZE", "256"))
+CLIENT_CACHE_TTL = float(os.getenv("RECOMMENDER_CLIENT_CACHE_TTL", "300"))
+
+RETRY_STATUSES = (502, 503, 504)
+MAX_RETRY_AFTER = 10.0
+
+class RecommenderError(Exception):
+    def __init__(self, message: str, status_code: int = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+def cache_key(query: str, catalog_id: str = None, fields: List[str] = None) -> tuple:
+    # Same normalization as the server's result cache and ETag
+    return (normalize_query(query), catalog_id, tuple(fields) if fields else None)
+
+class ResponseCache:
+    """Thread-safe LRU of recent responses with a TTL.
+
+    Expired entries are kept with their ETag so the next request can be a
+    conditional one: a 304 refreshes the entry without re-downloading it.
+    """
+
+    def __init__(self, maxsize: int = CLIENT_CACHE_SIZE, ttl: float = CLIENT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+
+    def lookup(self, key):
+        """(fresh value or None, etag of a stale entry or None)"""
+        if self.maxsize <= 0:
+            return None, None
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, None
+            self._data.move_to_end(key)
+            expires, etag, value = entry
+            if time.monotonic() < expires:
+                self.hits += 1
+                return value, None
+            self.misses += 1
+            return None, etag
+
+    def put(self, key, value, etag: str = None):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, etag, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def refresh(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            self.revalidated += 1
+            self._data[key] = (time.monotonic() + self.ttl, entry[1], entry[2])
+            return entry[2]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'revalidated': self.revalidated,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None
+        }
+
+def _request_body(query: str, catalog_id: str = None) -> Dict:
+    body = {"query": query}
+    if catalog_id:
+        body["catalog_id"] = catalog_id
+    return body
+
+def _request_params(fields: List[str] = None) -> Dict:
+    return {"fields": ",".join(fields)} if fields else {}
+
+def _error_detail(response) -> str:
+    try:
+        return response.json().get("detail", response.text)
+    except ValueError:
+        return response.text
+
+class RecommenderClient:
+    """Blocking client for the /recommend API.
+
+    One pooled requests.Session per client keeps connections alive across
+    calls; connection errors and 502/503/504 are retried with exponential
+    backoff, honouring Retry-After. Share one instance across threads.
+    """
+
+    def __init__(self, base_url: str = API_BASE_URL, timeout: float = CLIENT_TIMEOUT,
+                 connect_timeout: float = CLIENT_CONNECT_TIMEOUT, retries: int = CLIENT_RETRIES,
+                 backoff: float = CLIENT_BACKOFF, pool_size: int = CLIENT_POOL_SIZE,
+                 cache: ResponseCache = None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, timeout)
+        self.pool_size = pool_size
+        self.cache = cache if cache is not None else ResponseCache()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=backoff,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset({"GET", "POST"}),
+                respect_retry_after_header=True,
+                raise_on_status=False
+            )
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def health(self) -> Dict:
+        response = self.session.get(f"{self.base_url}/health", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def recommend(self, query: str, catalog_id: str = None, fields: List[str] = None,
+                  use_cache: bool = True) -> List[Dict]:
+        key = cache_key(query, catalog_id, fields)
+        cached, etag = self.cache.lookup(key) if use_cache else (None, None)
+        if cached is not None:
+            return cached
+
+        headers = {"If-None-Match": etag} if etag else {}
+        try:
+            response = self.session.post(
+                f"{self.base_url}/recommend",
+                json=_request_body(query, catalog_id),
+                params=_request_params(fields),
+                headers=headers,
+                timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            raise RecommenderError(f"Request failed: {e}") from e
+
+        if response.status_code == 304:
+            refreshed = self.cache.refresh(key)
+            if refreshed is not None:
+                return refreshed
+            return self.recommend(query, catalog_id, fields, use_cache=False)
+        if response.status_code != 200:
+            raise RecommenderError(_error_detail(response), response.status_code)
+
+        recommendations = response.json()["recommended_assessments"]
+        # Degraded or empty answers come without an ETag; do not keep them
+        if response.headers.get("ETag"):
+            self.cache.put(key, recommendations, response.headers["ETag"])
+        return recommendations
+
+    def iter_recommendations(self, queries: Iterable[str], concurrency: int = None, **kwargs):
+        """Yield (position, recommendations or RecommenderError) as each query finishes."""
+        with ThreadPoolExecutor(max_workers=concurrency or self.pool_size) as executor:
+            futures = {executor.submit(self.recommend, query, **kwargs): i for i, query in enumerate(queries)}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result()
+                except RecommenderError as e:
+                    yield futures[future], e
+
+    def recommend_many(self, queries: Iterable[str], concurrency: int = None, **kwargs) -> List:
+        """Results in input order; failed queries hold their RecommenderError."""
+        queries = list(queries)
+        results = [None] * len(queries)
+        for i, result in self.iter_recommendations(queries, concurrency, **kwargs):
+            results[i] = result
+        return results
+
+class AsyncRecommenderClient:
+    """asyncio counterpart of RecommenderClient on a pooled httpx.AsyncClient.
+
+    recommend_many runs a batch with at most `concurrency` requests in
+    flight; as_completed streams results as they arrive.
+    """
+
+    def __init__(self, base_url: str = API_BASE_URL, timeout: float = CLIENT_TIMEOUT,
+                 connect_timeout: float = CLIENT_CONNECT_TIMEOUT, retries: int = CLIENT_RETRIES,
+                 backoff: float = CLIENT_BACKOFF, pool_size: int = CLIENT_POOL_SIZE,
+                 cache: ResponseCache = None):
+        import httpx
+
+        self._httpx = httpx
+        self.base_url = base_url.rstrip("/")
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self.cache = cache if cache is not None else ResponseCache()
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        )
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    def _retry_delay(self, attempt: int, response=None) -> float:
+        if response is not None and response.headers.get("Retry-After"):
+            try:
+                return min(float(response.headers["Retry-After"]), MAX_RETRY_AFTER)
+            except ValueError:
+                pass
+        # Full jitter so a batch of shed requests does not come back in lockstep
+        return random.uniform(0, self.backoff * 2 ** attempt)
+
+    async def _post(self, query: str, catalog_id: str, fields: List[str], headers: Dict):
+        for attempt in range(self.retries + 1):
+            response = None
+            try:
+                response = await self.client.post(
+                    "/recommend",
+                    json=_request_body(query, catalog_id),
+                    params=_request_params(fields),
+                    headers=headers
+                )
+            except self._httpx.TransportError as e:
+                if attempt == self.retries:
+                    raise RecommenderError(f"Request failed: {e}") from e
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    return response
+            await asyncio.sleep(self._retry_delay(attempt, response))
+
+    async def health(self) -> Dict:
+        response = await self.client.get("/health")
+        response.raise_for_status()
+        return response.json()
+
+    async def recommend(self, query: str, catalog_id: str = None, fields: List[str] = None,
+                        use_cache: bool = True) -> List[Dict]:
+        key = cache_key(query, catalog_id, fields)
+        cached, etag = self.cache.lookup(key) if use_cache else (None, None)
+        if cached is not None:
+            return cached
+
+        response = await self._post(query, catalog_id, fields, {"If-None-Match": etag} if etag else {})
+        if response.status_code == 304:
+            refreshed = self.cache.refresh(key)
+            if refreshed is not None:
+                return refreshed
+            return await self.recommend(query, catalog_id, fields, use_cache=False)
+        if response.status_code != 200:
+            raise RecommenderError(_error_detail(response), response.status_code)
+
+        recommendations = response.json()["recommended_assessments"]
+        # Degraded or empty answers come without an ETag; do not keep them
+        if response.headers.get("ETag"):
+            self.cache.put(key, recommendations, response.headers["ETag"])
+        return recommendations
+
+    async def as_completed(self, queries: Iterable[str], concurrency: Optional[int] = None, **kwargs):
+        """Async generator of (position, recommendations or RecommenderError) in completion order."""
+        semaphore = asyncio.Semaphore(concurrency or self.pool_size)
+
+        async def run(i, query):
+            async with semaphore:
+                try:
+                    return i, await self.recommend(query, **kwargs)
+                except RecommenderError as e:
+                    return i, e
+
+        tasks = [asyncio.ensure_future(run(i, query)) for i, query in enumerate(queries)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def recommend_many(self, queries: Iterable[str], concurrency: Optional[int] = None, **kwargs) -> List:
+        """Results in input order; failed queries hold their RecommenderError."""
+        queries = list(queries)
+        results = [None] * len(queries)
+        async for i, result in self.as_completed(queries, concurrency, **kwargs):
+            results[i] = result
+        return results
@@ -0,0 +1,107 @@
+"""Synthetic scale-out benchmark: HNSW index vs exact search.
+
+Run from the repo root:
+    python -m Evaluation.benchmark_ann --sizes 10000 100000 1000000
+
+Vectors are drawn around random cluster centres and L2-normalised, which is
+closer to sentence embeddings than uniform noise. For every catalog size it
+reports build time, index memory, per-query latency and recall@10 against
+exact search for several ef_search values.
+"""
+import argparse
+import resource
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from Experiments.ann_index import AnnIndex, ExactIndex, recall_at_k
+
+def synthetic_embeddings(n: int, dim: int, n_clusters: int = 256, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    vectors = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, 100000):
+        end = min(start + 100000, n)
+        assignment = rng.integers(0, n_clusters, end - start)
+        vectors[start:end] = centres[assignment] + 0.6 * rng.standard_normal((end - start, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def per_query_latency_ms(search, queries, k):
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        search(query, k)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+def benchmark_size(n, dim, n_queries, k, ef_values, m, ef_construction):
+    data = synthetic_embeddings(n, dim)
+    queries = synthetic_embeddings(n_queries, dim, seed=1)
+
+    exact = ExactIndex(data)
+    exact_labels, _ = exact.query(queries, k)
+    exact_p50, exact_p99 = per_query_latency_ms(exact.query, queries[:min(n_queries, 50)], k)
+
+    rss_before = peak_rss_mb()
+    started = time.perf_counter()
+    ann = AnnIndex(dim=dim, max_elements=n, m=m, ef_construction=ef_construction)
+    # Insert in slices to exercise the same incremental path the catalog build uses
+    for start in range(0, n, 50000):
+        ann.add(data[start:start + 50000])
+    build_seconds = time.perf_counter() - started
+
+    rows = [{
+        "items": n,
+        "mode": "exact",
+        "ef_search": None,
+        "build_s": None,
+        "index_mb": round(data.nbytes / 2**20, 1),
+        "p50_ms": round(exact_p50, 3),
+        "p99_ms": round(exact_p99, 3),
+        "recall@10": 1.0
+    }]
+    for ef in ef_values:
+        ann.set_ef(ef)
+        labels, _ = ann.query(queries, k)
+        p50, p99 = per_query_latency_ms(ann.query, queries, k)
+        rows.append({
+            "items": n,
+            "mode": "hnsw",
+            "ef_search": ef,
+            "build_s": round(build_seconds, 2),
+            "index_mb": round(ann.memory_bytes() / 2**20, 1),
+            "p50_ms": round(p50, 3),
+            "p99_ms": round(p99, 3),
+            "recall@10": round(recall_at_k(labels, exact_labels), 4)
+        })
+    print(f"{n} items: build {build_seconds:.1f}s, peak RSS grew by {peak_rss_mb() - rss_before:.0f} MB")
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = []
+    for n in args.sizes:
+        rows.extend(benchmark_size(n, args.dim, args.queries, args.k, args.ef, args.m, args.ef_construction))
+
+    print("=" * 70)
+    print(pd.DataFrame(rows).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Recall@10 and candidate pool diversity with and without near-duplicate collapsing.
+
+Run from the repo root:
+    python -m Evaluation.benchmark_dedupe
+
+The index is built once with cluster ids; DEDUPE_CLUSTERS only changes the
+query path. "pool" is the number of candidates scored per query and
+"distinct" the number of clusters among them, i.e. the effective pool size.
+"""
+import statistics
+import time
+
+import pandas as pd
+
+from Evaluation.evaluate import load_train_set, calculate_recall_at_k, K
+from Experiments import rag
+
+def run(items, index, dedupe):
+    rag.DEDUPE_CLUSTERS = dedupe
+    latencies, recalls, pools, distinct, duplicates = [], [], [], [], []
+    for item in items:
+        candidates = rag.retrieve_candidates(index, rag.encode_query(item["query"]))
+        pools.append(len(candidates))
+        distinct.append(len({rag.cluster_of(candidate) for candidate, _ in candidates}))
+
+        rag.result_cache.clear()
+        started = time.perf_counter()
+        recs = rag.recommend_from_index(index, item["query"], top_k=K)
+        latencies.append((time.perf_counter() - started) * 1000)
+        recalls.append(calculate_recall_at_k([r["url"] for r in recs], item["ground_truth_urls"], K))
+
+        clusters = {candidate["url"]: rag.cluster_of(candidate) for candidate, _ in candidates}
+        duplicates.append(len(recs) - len({clusters.get(r["url"], r["url"]) for r in recs}))
+
+    return {
+        "mode": "collapsed" if dedupe else "raw",
+        "mean_pool": round(statistics.mean(pools), 1),
+        "mean_distinct": round(statistics.mean(distinct), 1),
+        "duplicate_slots@10": round(statistics.mean(duplicates), 2),
+        "p50_ms": round(statistics.median(latencies), 1),
+        "mean_recall@10": round(sum(recalls) / len(recalls), 4),
+    }
+
+def main():
+    items = load_train_set()
+    rag.DEDUPE_CLUSTERS = True
+    rag.ingest_data()
+
+    with rag.acquire_index() as index:
+        print(f"Catalog: {index.count} assessments in {index.clusters} near-duplicate clusters "
+              f"(similarity >= {rag.DEDUPE_SIMILARITY})")
+        for item in items:
+            rag.encode_query(item["query"])
+        rows = [run(items, index, dedupe) for dedupe in (False, True)]
+
+    print("=" * 70)
+    print(pd.DataFrame(rows).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
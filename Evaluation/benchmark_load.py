@@ -0,0 +1,108 @@
+"""Open-loop load test for /recommend against a local server.
+
+Start the API first (uvicorn api.main:app --port 8000), then run:
+    python -m Evaluation.benchmark_load --overload 2.0 --duration 30
+
+It first measures sustainable throughput with a short closed-loop warm-up
+at the server's concurrency, then fires requests at `overload` times that
+rate on a fixed schedule, whether or not earlier requests have finished.
+Each query gets a unique suffix so the result cache cannot absorb the
+load. It reports status codes and latency percentiles for accepted and
+shed requests.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+import httpx
+import pandas as pd
+
+from Evaluation.evaluate import load_train_set
+
+def percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * p))], 1)
+
+async def send(client, url, query, timeout_ms, results):
+    started = time.perf_counter()
+    try:
+        response = await client.post(
+            url,
+            json={"query": query},
+            headers={"X-Request-Timeout-Ms": str(timeout_ms)}
+        )
+        status = response.status_code
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    results.append((status, (time.perf_counter() - started) * 1000))
+
+async def measure_capacity(client, url, queries, seconds, timeout_ms, concurrency):
+    results = []
+    started = time.perf_counter()
+
+    async def worker(worker_id):
+        i = 0
+        while time.perf_counter() - started < seconds:
+            query = f"{queries[i % len(queries)]} (warmup {worker_id}-{i})"
+            await send(client, url, query, timeout_ms, results)
+            i += 1
+
+    await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    completed = sum(1 for status, _ in results if status == 200)
+    return completed / (time.perf_counter() - started)
+
+async def run(args):
+    queries = [item["query"] for item in load_train_set()]
+    limits = httpx.Limits(max_connections=1000, max_keepalive_connections=100)
+    async with httpx.AsyncClient(timeout=args.client_timeout, limits=limits) as client:
+        capacity = args.capacity or await measure_capacity(
+            client, args.url, queries, args.warmup, args.timeout_ms, args.warmup_concurrency
+        )
+        rate = capacity * args.overload
+        print(f"Measured capacity {capacity:.2f} req/s, offering {rate:.2f} req/s for {args.duration}s")
+
+        results, tasks = [], []
+        interval = 1.0 / rate
+        started = time.perf_counter()
+        i = 0
+        while time.perf_counter() - started < args.duration:
+            query = f"{queries[i % len(queries)]} (load {i})"
+            tasks.append(asyncio.create_task(send(client, args.url, query, args.timeout_ms, results)))
+            i += 1
+            await asyncio.sleep(max(0.0, started + i * interval - time.perf_counter()))
+        await asyncio.gather(*tasks)
+
+    statuses = Counter(status for status, _ in results)
+    ok = [latency for status, latency in results if status == 200]
+    shed = [latency for status, latency in results if status in (429, 503, 504)]
+    summary = pd.DataFrame([
+        {"requests": "accepted (200)", "count": len(ok), "p50_ms": percentile(ok, 0.5),
+         "p99_ms": percentile(ok, 0.99), "max_ms": round(max(ok), 1) if ok else None},
+        {"requests": "shed (429/503/504)", "count": len(shed), "p50_ms": percentile(shed, 0.5),
+         "p99_ms": percentile(shed, 0.99), "max_ms": round(max(shed), 1) if shed else None},
+    ])
+    print("=" * 70)
+    print(f"Status codes: {dict(statuses)}")
+    print(f"Goodput: {len(ok) / args.duration:.2f} req/s")
+    if ok:
+        print(f"Mean accepted latency: {statistics.mean(ok):.1f} ms")
+    print(summary.to_string(index=False))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000/recommend")
+    parser.add_argument("--overload", type=float, default=2.0, help="offered load as a multiple of capacity")
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--warmup", type=float, default=10, help="seconds of closed-loop capacity measurement")
+    parser.add_argument("--warmup-concurrency", type=int, default=2, help="match the server's MAX_INFLIGHT")
+    parser.add_argument("--capacity", type=float, help="skip the warm-up and use this req/s as capacity")
+    parser.add_argument("--timeout-ms", type=int, default=5000, help="per-request deadline sent to the server")
+    parser.add_argument("--client-timeout", type=float, default=60)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Latency and recall of single-pass vs chunked query encoding on long JDs.
+
+Run from the repo root:
+    python -m Evaluation.benchmark_long_jd
+
+The URL path is exercised against a local stub server that serves each JD as
+an HTML page, so no external network access is needed.
+"""
+import statistics
+import threading
+import time
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from Evaluation.evaluate import load_train_set, calculate_recall_at_k, K
+from Experiments import rag
+from Experiments import jd_fetch
+
+LONG_QUERY_MIN_WORDS = 120
+
+def long_queries(train_data):
+    return [item for item in train_data if len(item["query"].split()) >= LONG_QUERY_MIN_WORDS]
+
+def run_queries(items, label):
+    latencies, recalls = [], []
+    for item in items:
+        rag.result_cache.clear()
+        rag.embedding_cache.clear()
+        started = time.perf_counter()
+        recs = rag.get_balanced_recommendations(item["query"], top_k=K)
+        latencies.append((time.perf_counter() - started) * 1000)
+        recalls.append(calculate_recall_at_k([r["url"] for r in recs], item["ground_truth_urls"], K))
+
+    return {
+        "mode": label,
+        "queries": len(items),
+        "p50_ms": round(statistics.median(latencies), 1),
+        "max_ms": round(max(latencies), 1),
+        "mean_recall@10": round(sum(recalls) / len(recalls), 4),
+    }
+
+def start_stub_server(pages):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = pages.get(self.path)
+            if body is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+            payload = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def benchmark_url_path(items, tmp_cache_dir):
+    pages = {}
+    for i, item in enumerate(items):
+        paragraphs = "".join(f"<p>{escape(line)}</p>" for line in item["query"].splitlines() if line.strip())
+        pages[f"/jd/{i}"] = f"<html><head><script>var x = 1;</script></head><body>{paragraphs}</body></html>"
+
+    server = start_stub_server(pages)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    jd_fetch.JD_CACHE_DIR = tmp_cache_dir
+    # The stub server listens on loopback, which fetch_jd_text refuses by default
+    jd_fetch.JD_ALLOW_PRIVATE_HOSTS = True
+
+    url_items = [
+        {"query": f"{base}/jd/{i}", "ground_truth_urls": item["ground_truth_urls"]}
+        for i, item in enumerate(items)
+    ]
+    rows = [run_queries(url_items, "url (cold fetch)"), run_queries(url_items, "url (disk cache)")]
+    server.shutdown()
+    return rows
+
+def main():
+    import tempfile
+
+    items = long_queries(load_train_set())
+    if not items:
+        print(f"No train queries with at least {LONG_QUERY_MIN_WORDS} words")
+        return
+
+    rag.ingest_data()
+    print(f"Benchmarking {len(items)} long-JD queries (>= {LONG_QUERY_MIN_WORDS} words)")
+
+    rows = []
+    rag.CHUNK_LONG_QUERIES = False
+    rows.append(run_queries(items, "single encode (truncated)"))
+    rag.CHUNK_LONG_QUERIES = True
+    rows.append(run_queries(items, "chunked + pooled"))
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        rows.extend(benchmark_url_path(items, cache_dir))
+
+    print("=" * 70)
+    print(pd.DataFrame(rows).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
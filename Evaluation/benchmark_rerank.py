@@ -0,0 +1,77 @@
+"""Latency and recall@10 of the cross-encoder reranking stage for several top-N.
+
+Run from the repo root:
+    python -m Evaluation.benchmark_rerank --top-n 0 10 20 30 50
+
+N=0 is the current rule-based ordering. Each N is run twice: once with an
+unlimited budget to show what the cross-encoder can reach, and once with
+RERANK_BUDGET_MS to show what a request actually gets, including fallbacks.
+Query embeddings are warmed first so the numbers isolate the rerank stage.
+"""
+import argparse
+import statistics
+import time
+
+import pandas as pd
+
+from Evaluation.evaluate import load_train_set, calculate_recall_at_k, K
+from Experiments import rag
+from Experiments.reranker import CrossEncoderReranker, RERANK_BUDGET_MS
+
+def run(items, label, top_n, budget_ms):
+    if top_n > 0:
+        rag.reranker.top_n = top_n
+        rag.reranker.budget_ms = budget_ms
+        rag.reranker.cache.clear()
+        fallbacks_before = rag.reranker.fallbacks
+    active = rag.reranker if top_n > 0 else None
+    reranker, rag.reranker = rag.reranker, active
+
+    latencies, recalls = [], []
+    for item in items:
+        rag.result_cache.clear()
+        started = time.perf_counter()
+        recs = rag.get_balanced_recommendations(item["query"], top_k=K)
+        latencies.append((time.perf_counter() - started) * 1000)
+        recalls.append(calculate_recall_at_k([r["url"] for r in recs], item["ground_truth_urls"], K))
+
+    rag.reranker = reranker
+    latencies.sort()
+    return {
+        "mode": label,
+        "top_n": top_n,
+        "budget_ms": budget_ms if top_n > 0 else None,
+        "p50_ms": round(statistics.median(latencies), 1),
+        "p95_ms": round(latencies[max(0, int(len(latencies) * 0.95) - 1)], 1),
+        "fallbacks": rag.reranker.fallbacks - fallbacks_before if top_n > 0 else 0,
+        "mean_recall@10": round(sum(recalls) / len(recalls), 4),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top-n", type=int, nargs="+", default=[0, 10, 20, 30, 50])
+    parser.add_argument("--budget-ms", type=float, default=RERANK_BUDGET_MS)
+    args = parser.parse_args()
+
+    items = load_train_set()
+    rag.ingest_data()
+    if rag.reranker is None:
+        rag.reranker = CrossEncoderReranker(cache=rag.LRUCache(rag.RERANK_CACHE_SIZE))
+    rag.reranker.model
+
+    for item in items:
+        rag.encode_query(item["query"])
+
+    rows = []
+    for top_n in args.top_n:
+        if top_n == 0:
+            rows.append(run(items, "rule-based", 0, None))
+            continue
+        rows.append(run(items, "cross-encoder, no budget", top_n, float("inf")))
+        rows.append(run(items, "cross-encoder, budgeted", top_n, args.budget_ms))
+
+    print("=" * 70)
+    print(pd.DataFrame(rows).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Per-response serialization cost of /recommend, before and after the fast path.
+
+Run from the repo root:
+    python -m Evaluation.benchmark_serialization
+
+"before" mirrors what FastAPI did with response_model: build dicts with a
+stringified duration, validate them through RecommendationResponse, run
+jsonable_encoder and json.dumps. "after" is the fast path used by api/main.py.
+No model or index is needed; recommendations are taken from the catalog.
+"""
+import json
+import statistics
+import time
+from pathlib import Path
+
+import pandas as pd
+from fastapi.encoders import jsonable_encoder
+
+from api.serialization import (
+    ASSESSMENT_FIELDS,
+    RecommendationResponse,
+    format_assessment,
+    dumps,
+    compress,
+    brotli,
+)
+
+ITERATIONS = 2000
+DATA_PATH = Path(__file__).resolve().parent.parent / "Data" / "shl_data.json"
+
+def load_sample_recommendations(n):
+    # Same shape get_balanced_recommendations returns
+    with open(DATA_PATH, "r", encoding="utf-8") as f:
+        catalog = json.load(f)
+    return [{
+        "name": item["name"],
+        "url": item["url"],
+        "description": item["description"][:300],
+        "duration": item["duration"] if isinstance(item.get("duration"), int) else 30,
+        "test_type": item.get("test_type") or ["K"],
+        "adaptive_support": item.get("adaptive_support", "No"),
+        "remote_support": item.get("remote_support", "Yes"),
+    } for item in catalog[:n]]
+
+def before(recommendations):
+    formatted = []
+    for rec in recommendations:
+        formatted.append({
+            "url": rec.get("url"),
+            "name": rec.get("name"),
+            "description": rec.get("description"),
+            "duration": str(rec.get("duration")),
+            "test_type": rec.get("test_type"),
+            "adaptive_support": rec.get("adaptive_support"),
+            "remote_support": rec.get("remote_support"),
+        })
+    validated = RecommendationResponse(recommended_assessments=formatted)
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def after(recommendations, fields=ASSESSMENT_FIELDS, encoding=None):
+    body = dumps({"recommended_assessments": [format_assessment(rec, fields) for rec in recommendations]})
+    return compress(body, encoding)
+
+def time_us(fn, *args):
+    samples = []
+    for _ in range(ITERATIONS):
+        started = time.perf_counter()
+        body = fn(*args)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return statistics.median(samples), len(body)
+
+def main():
+    recommendations = load_sample_recommendations(10)
+    cases = [
+        ("before (pydantic + json)", before, (recommendations,)),
+        ("after (fast path)", after, (recommendations,)),
+        ("after, fields=url,name", after, (recommendations, ("url", "name"))),
+        ("after + gzip", after, (recommendations, ASSESSMENT_FIELDS, "gzip")),
+    ]
+    if brotli is not None:
+        cases.append(("after + br", after, (recommendations, ASSESSMENT_FIELDS, "br")))
+
+    rows = []
+    for label, fn, args in cases:
+        median_us, size = time_us(fn, *args)
+        rows.append({"path": label, "median_us": round(median_us, 1), "bytes": size})
+
+    print(pd.DataFrame(rows).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Cold start: time from launching the API to its first successful /recommend.
+
+Bake the artifact first, then run from the repo root:
+    python -m Experiments.build_artifact --out artifacts
+    python -m Evaluation.benchmark_startup --runs 3
+
+"runtime" is the current flow: the model comes from the Hugging Face hub
+(an empty HF_HOME per run with --cold-hub, as in a fresh container) and
+the catalog is embedded during lifespan. "baked" starts with
+ARTIFACT_DIR and HF_HUB_OFFLINE=1, loading both from disk.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+QUERY = "Java developer who can collaborate with business teams, 40 minutes"
+
+def post_recommend(port: int) -> bool:
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/recommend",
+        data=json.dumps({"query": QUERY}).encode("utf-8"),
+        headers={"Content-Type": "application/json"}
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status == 200
+    except (urllib.error.URLError, ConnectionError, TimeoutError):
+        return False
+
+def measure(label: str, env: dict, port: int, timeout: float) -> dict:
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api.main:app", "--port", str(port)],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"{label}: server exited with code {server.returncode}")
+            if post_recommend(port):
+                return {"mode": label, "seconds": time.perf_counter() - started}
+            time.sleep(0.25)
+        raise RuntimeError(f"{label}: no successful /recommend within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--artifact-dir", default=os.path.join(BASE_DIR, "artifacts"))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--cold-hub", action="store_true", help="start runtime mode with an empty Hugging Face cache")
+    args = parser.parse_args()
+
+    if not os.path.isdir(os.path.join(args.artifact_dir, "model")):
+        raise SystemExit(f"No artifact at {args.artifact_dir}; run python -m Experiments.build_artifact first")
+
+    base_env = {k: v for k, v in os.environ.items() if k not in ("ARTIFACT_DIR", "INDEX_MODE", "ANN_INDEX_DIR")}
+    # No replayed warm-up queries, so both modes do the same work before serving
+    base_env["QUERY_LOG_PATH"] = os.path.join(tempfile.mkdtemp(prefix="startup_log_"), "queries.jsonl")
+    base_env["QUERY_LOG_SAMPLE_RATE"] = "0"
+    baked_env = dict(base_env, ARTIFACT_DIR=os.path.abspath(args.artifact_dir),
+                     HF_HUB_OFFLINE="1", TRANSFORMERS_OFFLINE="1")
+
+    rows = []
+    for run in range(args.runs):
+        runtime_env = dict(base_env)
+        if args.cold_hub:
+            runtime_env["HF_HOME"] = tempfile.mkdtemp(prefix="hf_home_")
+        rows.append(measure("runtime", runtime_env, args.port, args.timeout))
+        rows.append(measure("baked", baked_env, args.port, args.timeout))
+        print(f"Run {run + 1}/{args.runs}: runtime {rows[-2]['seconds']:.1f}s, baked {rows[-1]['seconds']:.1f}s")
+
+    df = pd.DataFrame(rows)
+    summary = df.groupby("mode", sort=False)["seconds"].agg(["count", "mean", "min", "max"]).round(2)
+    summary["median"] = df.groupby("mode", sort=False)["seconds"].apply(statistics.median).round(2)
+
+    print("=" * 70)
+    print("Time to first successful /recommend (seconds)")
+    print(summary.to_string())
+
+if __name__ == "__main__":
+    main()
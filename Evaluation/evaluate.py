@@ -1,13 +1,18 @@
+import asyncio
 import json
-import requests
+import os
 from typing import List, Dict
 import pandas as pd
 from pathlib import Path
 
-API_URL = "http://localhost:8000/recommend"
+from Client.api_client import AsyncRecommenderClient, RecommenderError
+
+API_URL = os.getenv("RECOMMENDER_API_URL", "http://localhost:8000")
+EVAL_CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", "4"))
 K = 10
+EXCEL_PATH = Path(__file__).resolve().parent.parent / "Data" / "Gen_AI Dataset.xlsx"
 
-def load_train_set() -> List[Dict]:
+def load_train_set(excel_path: Path = EXCEL_PATH) -> List[Dict]:
     train_data = [
         {
             "query": "I am hiring for Java developers who can also collaborate effectively with my business teams. Looking for an assessment(s) that can be completed in 40 minutes.",
@@ -22,7 +27,6 @@ def load_train_set() -> List[Dict]:
     ]
 
     try:
-        excel_path = "Gen_AI Dataset.xlsx"
         if Path(excel_path).exists():
             df = pd.read_excel(excel_path, sheet_name="Train-Set")
             train_data = []
@@ -48,15 +52,22 @@ def calculate_recall_at_k(predicted_urls: List[str], ground_truth_urls: List[str
         return 0.0
     return relevant_retrieved / total_relevant
 
+async def fetch_predictions(queries: List[str]) -> List:
+    # The server sheds load past MAX_INFLIGHT + MAX_QUEUE; the client retries 503s with backoff
+    async with AsyncRecommenderClient(API_URL, timeout=30) as client:
+        return await client.recommend_many(queries, concurrency=EVAL_CONCURRENCY, use_cache=False)
+
 def evaluate_model():
     train_data = load_train_set()
-    print(f"Evaluating on {len(train_data)} train queries...")
+    print(f"Evaluating on {len(train_data)} train queries ({EVAL_CONCURRENCY} concurrent requests)...")
     print("=" * 70)
 
+    predictions_per_query = asyncio.run(fetch_predictions([item["query"] for item in train_data]))
+
     results = []
     total_recall = 0
 
-    for i, item in enumerate(train_data, 1):
+    for i, (item, predictions) in enumerate(zip(train_data, predictions_per_query), 1):
         query = item["query"]
         ground_truth = item["ground_truth_urls"]
 
@@ -64,52 +75,38 @@ def evaluate_model():
         print(f"   Query: {query[:80]}...")
         print(f"   Expected URLs: {len(ground_truth)}")
 
-        try:
-            response = requests.post(
-                API_URL,
-                json={"query": query},
-                timeout=30
-            )
-
-            if response.status_code == 200:
-                data = response.json()
-                predictions = data.get("recommended_assessments", [])
-                predicted_urls = [p["url"] for p in predictions]
-                recall = calculate_recall_at_k(predicted_urls, ground_truth, K)
-                found = len(set(predicted_urls[:K]) & set(ground_truth))
-
-                results.append({
-                    "query": query[:50] + "...",
-                    "ground_truth_count": len(ground_truth),
-                    "found_count": found,
-                    "recall@10": recall
-                })
-
-                total_recall += recall
-
-                print(f"   Found {found}/{len(ground_truth)} relevant assessments")
-                print(f"   Recall@{K}: {recall:.4f}")
-
-                matches = set(predicted_urls[:K]) & set(ground_truth)
-                if matches:
-                    print(f"   Matches: {len(matches)}")
+        if isinstance(predictions, RecommenderError):
+            if predictions.status_code:
+                print(f"   API Error: {predictions.status_code}")
             else:
-                print(f"   API Error: {response.status_code}")
-                results.append({
-                    "query": query[:50] + "...",
-                    "ground_truth_count": len(ground_truth),
-                    "found_count": 0,
-                    "recall@10": 0
-                })
-
-        except Exception as e:
-            print(f"   Exception: {e}")
+                print(f"   Exception: {predictions}")
             results.append({
                 "query": query[:50] + "...",
                 "ground_truth_count": len(ground_truth),
                 "found_count": 0,
                 "recall@10": 0
             })
+            continue
+
+        predicted_urls = [p["url"] for p in predictions]
+        recall = calculate_recall_at_k(predicted_urls, ground_truth, K)
+        found = len(set(predicted_urls[:K]) & set(ground_truth))
+
+        results.append({
+            "query": query[:50] + "...",
+            "ground_truth_count": len(ground_truth),
+            "found_count": found,
+            "recall@10": recall
+        })
+
+        total_recall += recall
+
+        print(f"   Found {found}/{len(ground_truth)} relevant assessments")
+        print(f"   Recall@{K}: {recall:.4f}")
+
+        matches = set(predicted_urls[:K]) & set(ground_truth)
+        if matches:
+            print(f"   Matches: {len(matches)}")
 
     mean_recall = total_recall / len(train_data) if train_data else 0
 
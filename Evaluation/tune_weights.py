@@ -0,0 +1,297 @@
+"""Offline search over the rerank weights in get_balanced_recommendations.
+
+Run from the repo root:
+    python -m Evaluation.tune_weights --configs 20000
+
+Retrieval and every weight-independent signal (distance, keyword hit
+counts, experience hits, duration bucket, test types, keyword density) are
+computed once per (query, candidate) pair of the Gen_AI train set and cached
+under .cache/. Each weight configuration is then just array arithmetic: the
+scores, the K/P split of balance_recommendations and recall@10 are evaluated
+for thousands of configurations at once. The best configuration is written
+to RERANK_WEIGHTS_PATH, which the engine loads at startup.
+
+The train set is small, so treat the winner as a candidate to confirm with
+Evaluation/evaluate.py rather than a final answer.
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from Evaluation.evaluate import load_train_set, K
+from Experiments import rag
+
+PARAMS = list(rag.DEFAULT_RERANK_WEIGHTS)
+CACHE_DIR = os.path.join(rag.BASE_DIR, ".cache")
+DURATION_PARAMS = ['duration_exact', 'duration_within_10', 'duration_within_20', 'duration_within_30', 'duration_far']
+
+def duration_bucket(query_duration, candidate_duration) -> int:
+    # 0 = no duration in the query, then one bucket per step of score_duration_match
+    if not query_duration:
+        return 0
+    diff = abs(query_duration - candidate_duration)
+    if diff == 0:
+        return 1
+    if diff <= 10:
+        return 2
+    if diff <= 20:
+        return 3
+    if diff <= 30:
+        return 4
+    return 5
+
+def skill_hit_counts(query_skills, candidate):
+    # Mirrors score_skill_match, counting hits per field instead of summing weights
+    counts = [0, 0, 0]
+    candidate_text = f"{candidate['name']} {candidate['description']}".lower()
+    candidate_skills = candidate.get('skills', '').lower()
+    for skill in query_skills:
+        for keyword in rag.SKILL_KEYWORDS.get(skill, []):
+            if keyword in candidate_text:
+                if keyword in candidate['name'].lower():
+                    counts[0] += 1
+                elif keyword in candidate['description'].lower():
+                    counts[1] += 1
+                elif keyword in candidate_skills:
+                    counts[2] += 1
+    return counts
+
+def experience_signals(query_level, candidate):
+    name = candidate['name'].lower()
+    hits = sum(1 for keyword in rag.EXPERIENCE_LEVELS.get(query_level, []) if keyword in name)
+    penalty = (query_level == 'entry' and any(t in name for t in rag.EXPERIENCE_LEVELS['senior'])) or \
+              (query_level == 'senior' and any(t in name for t in rag.EXPERIENCE_LEVELS['entry']))
+    return hits, int(penalty)
+
+def query_class(query) -> int:
+    # extract_query_keywords picks the K share from the split weights; feeding it
+    # the class ids as weights tells us which branch (default/technical/managerial) fired
+    probe = dict(rag.DEFAULT_RERANK_WEIGHTS, split_default_k=0, split_technical_k=1, split_managerial_k=2)
+    return rag.extract_query_keywords(query, weights=probe)['test_type_pref']['K']
+
+def compute_signals(train_data):
+    # Over-fetched members of the nearest clusters when near-duplicates are collapsed
+    n = rag.VECTOR_SEARCH_RESULTS * (rag.DEDUPE_OVERFETCH if rag.DEDUPE_CLUSTERS else 1)
+    q = len(train_data)
+    shape = (q, n)
+    signals = {name: np.zeros(shape, dtype=np.float32) for name in
+               ['sim', 'skill_name', 'skill_description', 'skill_skills', 'exp_hits', 'exp_penalty',
+                'density', 'is_k', 'is_p', 'has_types', 'reference_score']}
+    signals['duration_bucket'] = np.zeros(shape, dtype=np.int64)
+    signals['valid'] = np.zeros(shape, dtype=bool)
+    signals['relevant'] = np.zeros(shape, dtype=bool)
+    # Row-local cluster id: position of the cluster's first member (padding is its own cluster)
+    signals['cluster'] = np.tile(np.arange(n), (q, 1))
+    signals['query_class'] = np.zeros(q, dtype=np.int64)
+    signals['n_relevant'] = np.zeros(q, dtype=np.float32)
+
+    with rag.acquire_index() as index:
+        for qi, item in enumerate(train_data):
+            query = item['query']
+            if rag.is_url(query):
+                query = rag.fetch_jd_text(query)
+            analysis = rag.extract_query_keywords(query)
+            candidates = rag.retrieve_candidates(index, rag.encode_query(query))
+            first_member = {}
+            ground_truth = set(item['ground_truth_urls'])
+            signals['query_class'][qi] = query_class(query)
+            signals['n_relevant'][qi] = len(ground_truth)
+
+            for ci, (candidate, distance) in enumerate(candidates):
+                signals['cluster'][qi, ci] = first_member.setdefault(rag.cluster_of(candidate), ci)
+                types = [t.strip() for t in str(candidate.get('test_type', '')).split(',')]
+                a, b, c = skill_hit_counts(analysis['skills'], candidate)
+                hits, penalty = experience_signals(analysis['experience_level'], candidate)
+
+                signals['valid'][qi, ci] = True
+                signals['relevant'][qi, ci] = candidate['url'] in ground_truth
+                signals['sim'][qi, ci] = 1.0 / (1.0 + distance) if distance > 0 else 1.0
+                signals['skill_name'][qi, ci] = a
+                signals['skill_description'][qi, ci] = b
+                signals['skill_skills'][qi, ci] = c
+                signals['exp_hits'][qi, ci] = hits
+                signals['exp_penalty'][qi, ci] = penalty
+                signals['duration_bucket'][qi, ci] = duration_bucket(analysis['duration'], candidate.get('duration', 30))
+                signals['has_types'][qi, ci] = bool(candidate.get('test_type', ''))
+                signals['is_k'][qi, ci] = 'K' in types
+                signals['is_p'][qi, ci] = 'P' in types
+                signals['density'][qi, ci] = rag.score_keyword_density(query, candidate, weights={'keyword_density': 1})
+                # The engine's own score with the current weights, to check the vectorized formula
+                signals['reference_score'][qi, ci] = (
+                    signals['sim'][qi, ci] * rag.rerank_weights['distance']
+                    + rag.score_skill_match(analysis['skills'], candidate)
+                    + rag.score_experience_match(analysis['experience_level'], candidate)
+                    + rag.score_duration_match(analysis['duration'], candidate.get('duration', 30))
+                    + rag.score_test_type_match(analysis['test_type_pref'], candidate.get('test_type', ''))
+                    + rag.score_keyword_density(query, candidate)
+                )
+        version = index.version
+    return signals, version
+
+def load_signals(train_data, refresh=False):
+    with rag.acquire_index() as index:
+        version = index.version
+    queries_hash = hashlib.sha256(json.dumps(train_data, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+    settings = [rag.rerank_weights, rag.DEDUPE_CLUSTERS, rag.DEDUPE_OVERFETCH]
+    weights_hash = hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()[:8]
+    path = os.path.join(CACHE_DIR, f"tune_signals_{version}_{queries_hash}_{weights_hash}.npz")
+
+    if os.path.exists(path) and not refresh:
+        print(f"Using cached signals from {path}")
+        with np.load(path) as cached:
+            return {name: cached[name] for name in cached.files}, version
+
+    started = time.perf_counter()
+    signals, version = compute_signals(train_data)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    np.savez(path, **signals)
+    print(f"Computed signals for {len(train_data)} queries in {time.perf_counter() - started:.1f}s, cached to {path}")
+    return signals, version
+
+def scores_for(configs, s):
+    """(C, P) weight matrix -> (C, Q, N) candidate scores."""
+    w = {name: configs[:, i][:, None, None] for i, name in enumerate(PARAMS)}
+
+    skill = np.minimum(
+        w['skill_name'] * s['skill_name'] + w['skill_description'] * s['skill_description']
+        + w['skill_skills'] * s['skill_skills'],
+        w['skill_cap']
+    )
+    duration_table = np.concatenate(
+        [np.zeros((len(configs), 1)), configs[:, [PARAMS.index(p) for p in DURATION_PARAMS]]], axis=1
+    )
+    duration = duration_table[:, s['duration_bucket']]
+    split_k = split_k_for(configs, s)[:, :, None]
+    test_type = w['test_type_scale'] * s['has_types'] * (split_k * s['is_k'] + (100 - split_k) * s['is_p'])
+
+    scores = (
+        w['distance'] * s['sim'] + skill
+        + w['experience_match'] * s['exp_hits'] - w['experience_penalty'] * s['exp_penalty']
+        + duration + test_type + w['keyword_density'] * s['density']
+    )
+    return np.where(s['valid'], scores, -np.inf)
+
+def split_k_for(configs, s):
+    """(C, Q) K share of the test-type split for every query."""
+    split_columns = [PARAMS.index(p) for p in ['split_default_k', 'split_technical_k', 'split_managerial_k']]
+    return configs[:, split_columns][:, s['query_class']]
+
+def best_of_cluster(sorted_clusters):
+    """collapse_clusters on score-sorted rows: True at the first position of each cluster."""
+    by_cluster = np.argsort(sorted_clusters, axis=-1, kind='stable')
+    grouped = np.take_along_axis(sorted_clusters, by_cluster, axis=-1)
+    first = np.ones(grouped.shape, dtype=bool)
+    first[..., 1:] = grouped[..., 1:] != grouped[..., :-1]
+    keep = np.empty_like(first)
+    np.put_along_axis(keep, by_cluster, first, axis=-1)
+    return keep
+
+def balanced_selection(scores, configs, s, top_k=K):
+    """Vectorized balance_recommendations: (C, Q, N) bool mask of the selected candidates."""
+    order = np.argsort(-scores, axis=-1, kind='stable')
+    if rag.DEDUPE_CLUSTERS:
+        # collapse_clusters: cluster representatives first, then their siblings, each in score order
+        first = best_of_cluster(np.take_along_axis(np.broadcast_to(s['cluster'], scores.shape), order, axis=-1))
+        order = np.take_along_axis(order, np.argsort(~first, axis=-1, kind='stable'), axis=-1)
+    valid = np.take_along_axis(np.broadcast_to(s['valid'], scores.shape), order, axis=-1)
+    is_k = np.take_along_axis(np.broadcast_to(s['is_k'] > 0, scores.shape), order, axis=-1) & valid
+    is_p = np.take_along_axis(np.broadcast_to(s['is_p'] > 0, scores.shape), order, axis=-1) & valid
+
+    split_k = split_k_for(configs, s)
+    # Same float expression as int(top_k * (weight / 100)) so the quotas round identically
+    n_k = np.maximum(1, np.floor(top_k * (split_k / 100))).astype(np.int64)[..., None]
+    n_p = np.maximum(1, np.floor(top_k * ((100 - split_k) / 100))).astype(np.int64)[..., None]
+    # sorted() is stable, so K goes first on a tie
+    k_first = (split_k >= 100 - split_k)[..., None]
+
+    first_members = np.where(k_first, is_k, is_p)
+    second_members = np.where(k_first, is_p, is_k)
+    first = first_members & (np.cumsum(first_members, axis=-1) <= np.where(k_first, n_k, n_p))
+    second = second_members & (np.cumsum(second_members, axis=-1) <= np.where(k_first, n_p, n_k)) & ~first
+    second &= np.cumsum(second, axis=-1) <= top_k - first.sum(axis=-1, keepdims=True)
+
+    picked = first | second
+    open_slots = top_k - picked.sum(axis=-1, keepdims=True)
+    rest = valid & ~picked
+    selected = picked | (rest & (np.cumsum(rest, axis=-1) <= open_slots))
+    return selected, order
+
+def recall_at_k(configs, s, top_k=K):
+    """(C,) mean recall@k over the train queries."""
+    scores = scores_for(configs, s)
+    selected, order = balanced_selection(scores, configs, s, top_k)
+    relevant = np.take_along_axis(np.broadcast_to(s['relevant'], scores.shape), order, axis=-1)
+    hits = (selected & relevant).sum(axis=-1)
+    recall = hits / np.maximum(s['n_relevant'], 1)[None, :]
+    return recall.mean(axis=-1)
+
+def sample_configs(n, rng):
+    defaults = np.array([rag.DEFAULT_RERANK_WEIGHTS[p] for p in PARAMS], dtype=np.float64)
+    configs = rng.uniform(0, 2, size=(n, len(PARAMS))) * np.abs(defaults)
+    configs[:, PARAMS.index('duration_far')] = rng.uniform(-30, 10, n)
+    configs[:, PARAMS.index('skill_cap')] = rng.uniform(30, 200, n)
+    configs[:, PARAMS.index('test_type_scale')] = rng.uniform(0, 1.5, n)
+    for p in ['split_default_k', 'split_technical_k', 'split_managerial_k']:
+        configs[:, PARAMS.index(p)] = rng.integers(10, 91, n)
+    return configs
+
+def verify_against_engine(s):
+    current = np.array([[rag.rerank_weights[p] for p in PARAMS]], dtype=np.float64)
+    scores = scores_for(current, s)[0]
+    diff = np.abs(np.where(s['valid'], scores - s['reference_score'], 0)).max()
+    print(f"Max score difference vs engine with current weights: {diff:.2e}")
+    if diff > 1e-3:
+        raise SystemExit("Vectorized scores diverge from get_balanced_recommendations; refusing to tune")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--configs", type=int, default=20000)
+    parser.add_argument("--chunk", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--top", type=int, default=10, help="how many of the best configurations to print")
+    parser.add_argument("--out", default=rag.RERANK_WEIGHTS_PATH)
+    parser.add_argument("--refresh", action="store_true", help="recompute cached signals")
+    args = parser.parse_args()
+
+    train_data = load_train_set()
+    rag.ingest_data()
+    signals, version = load_signals(train_data, refresh=args.refresh)
+    verify_against_engine(signals)
+
+    rng = np.random.default_rng(args.seed)
+    baseline = np.array([[rag.rerank_weights[p] for p in PARAMS]], dtype=np.float64)
+    configs = np.concatenate([baseline, sample_configs(args.configs, rng)])
+
+    started = time.perf_counter()
+    recalls = np.concatenate([
+        recall_at_k(configs[i:i + args.chunk], signals) for i in range(0, len(configs), args.chunk)
+    ])
+    elapsed = time.perf_counter() - started
+    print(f"Evaluated {len(configs)} configurations in {elapsed:.2f}s ({len(configs) / elapsed:.0f} configs/s)")
+
+    best = np.argsort(-recalls, kind='stable')[:args.top]
+    table = pd.DataFrame(configs[best], columns=PARAMS).round(2)
+    table.insert(0, "recall@10", recalls[best].round(4))
+    print("=" * 70)
+    print(f"Baseline (current weights) recall@10: {recalls[0]:.4f}")
+    print(table.to_string(index=False))
+
+    winner = {p: round(float(v), 3) for p, v in zip(PARAMS, configs[best[0]])}
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump({
+            'weights': winner,
+            'recall@10': round(float(recalls[best[0]]), 4),
+            'baseline_recall@10': round(float(recalls[0]), 4),
+            'train_queries': len(train_data),
+            'configs_evaluated': len(configs),
+            'catalog_version': version
+        }, f, indent=2)
+    print(f"Best configuration written to {args.out}")
+
+if __name__ == "__main__":
+    main()
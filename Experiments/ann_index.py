@@ -0,0 +1,147 @@
+import json
+import os
+from typing import Tuple
+
+import numpy as np
+
+try:
+    # Shipped with chromadb as the chroma-hnswlib wheel
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+HNSW_M = int(os.getenv("HNSW_M", "16"))
+HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+
+INDEX_FILE = "hnsw.bin"
+PARAMS_FILE = "hnsw.json"
+
+def _require_hnswlib():
+    if hnswlib is None:
+        raise ImportError("hnswlib is required for the HNSW index mode (pip install chroma-hnswlib)")
+
+class AnnIndex:
+    """HNSW graph over the catalog embeddings.
+
+    Distances are squared L2 like Chroma's default space, so the rerank
+    formula sees the same numbers in either index mode. `m` and
+    `ef_construction` trade build time and memory for graph quality;
+    `ef_search` trades query latency for recall and can be changed at any time.
+    """
+
+    def __init__(self, dim: int, max_elements: int = 1024, m: int = HNSW_M,
+                 ef_construction: int = HNSW_EF_CONSTRUCTION, ef_search: int = HNSW_EF_SEARCH):
+        _require_hnswlib()
+        self.dim = dim
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self._index = hnswlib.Index(space='l2', dim=dim)
+        self._index.init_index(max_elements=max(max_elements, 1), ef_construction=ef_construction, M=m)
+        self._index.set_ef(ef_search)
+
+    def __len__(self) -> int:
+        return self._index.get_current_count()
+
+    def add(self, embeddings, ids=None):
+        """Insert vectors incrementally, growing the graph capacity as needed."""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.ndim == 1:
+            embeddings = embeddings[None, :]
+        count = len(self)
+        if ids is None:
+            ids = np.arange(count, count + len(embeddings))
+
+        needed = count + len(embeddings)
+        capacity = self._index.get_max_elements()
+        if needed > capacity:
+            self._index.resize_index(max(needed, capacity * 2))
+
+        self._index.add_items(embeddings, np.asarray(ids))
+
+    def set_ef(self, ef_search: int):
+        self.ef_search = ef_search
+        self._index.set_ef(ef_search)
+
+    def query(self, embeddings, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.ndim == 1:
+            embeddings = embeddings[None, :]
+        k = min(k, len(self))
+        # hnswlib searches with max(ef, k), so k above ef_search needs no change
+        # to the shared index (queries run concurrently in the threadpool)
+        return self._index.knn_query(embeddings, k=k)
+
+    def memory_bytes(self) -> int:
+        # Vectors plus the level-0 links (2*M ids per element); upper layers are negligible
+        return len(self) * (self.dim * 4 + 2 * self.m * 4 + 8)
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self._index.save_index(os.path.join(directory, INDEX_FILE))
+        with open(os.path.join(directory, PARAMS_FILE), 'w') as f:
+            json.dump({
+                'dim': self.dim,
+                'm': self.m,
+                'ef_construction': self.ef_construction,
+                'ef_search': self.ef_search,
+                'count': len(self)
+            }, f)
+
+    @classmethod
+    def load(cls, directory: str, ef_search: int = None) -> "AnnIndex":
+        _require_hnswlib()
+        with open(os.path.join(directory, PARAMS_FILE)) as f:
+            params = json.load(f)
+        index = cls.__new__(cls)
+        index.dim = params['dim']
+        index.m = params['m']
+        index.ef_construction = params['ef_construction']
+        index.ef_search = ef_search or params['ef_search']
+        index._index = hnswlib.Index(space='l2', dim=index.dim)
+        index._index.load_index(os.path.join(directory, INDEX_FILE), max_elements=params['count'])
+        index._index.set_ef(index.ef_search)
+        return index
+
+    @staticmethod
+    def exists(directory: str) -> bool:
+        return os.path.exists(os.path.join(directory, INDEX_FILE)) and os.path.exists(os.path.join(directory, PARAMS_FILE))
+
+class ExactIndex:
+    """Brute-force squared-L2 search, used as ground truth for recall."""
+
+    def __init__(self, embeddings):
+        self.embeddings = np.asarray(embeddings, dtype=np.float32)
+        self._norms = (self.embeddings ** 2).sum(axis=1)
+
+    def __len__(self) -> int:
+        return len(self.embeddings)
+
+    def query(self, embeddings, k: int, block_size: int = 65536) -> Tuple[np.ndarray, np.ndarray]:
+        queries = np.asarray(embeddings, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        k = min(k, len(self))
+        q_norms = (queries ** 2).sum(axis=1)[:, None]
+
+        best_labels = np.empty((len(queries), 0), dtype=np.int64)
+        best_distances = np.empty((len(queries), 0), dtype=np.float32)
+        # Blockwise so 1M x 384 never materialises a full distance matrix
+        for start in range(0, len(self), block_size):
+            block = self.embeddings[start:start + block_size]
+            distances = q_norms - 2 * queries @ block.T + self._norms[start:start + block_size][None, :]
+            labels = np.broadcast_to(np.arange(start, start + len(block)), distances.shape)
+            best_labels = np.concatenate([best_labels, labels], axis=1)
+            best_distances = np.concatenate([best_distances, distances], axis=1)
+            keep = np.argpartition(best_distances, k - 1, axis=1)[:, :k] if best_distances.shape[1] > k else None
+            if keep is not None:
+                best_labels = np.take_along_axis(best_labels, keep, axis=1)
+                best_distances = np.take_along_axis(best_distances, keep, axis=1)
+
+        order = np.argsort(best_distances, axis=1)
+        return np.take_along_axis(best_labels, order, axis=1), np.take_along_axis(best_distances, order, axis=1)
+
+def recall_at_k(approx_labels: np.ndarray, exact_labels: np.ndarray) -> float:
+    hits = sum(len(set(a) & set(e)) for a, e in zip(approx_labels.tolist(), exact_labels.tolist()))
+    return hits / exact_labels.size if exact_labels.size else 0.0
@@ -0,0 +1,89 @@
+"""Bake the embedding model and catalog indexes into a directory the API can load offline.
+
+Run from the repo root (the Dockerfile does this at image build time):
+    python -m Experiments.build_artifact --out artifacts
+
+Layout:
+    <out>/model/                     sentence-transformers model, loaded from disk
+    <out>/reranker/                  cross-encoder, only with --reranker
+    <out>/indexes/<version>_<dedupe>/ persisted HNSW graph + metadatas.json
+    <out>/manifest.json              what was built, with which settings
+
+Start the API with ARTIFACT_DIR=<out> (and HF_HUB_OFFLINE=1) to use it. Index
+directories are keyed by the catalog file's content hash and the dedupe
+settings, so a changed catalog or DEDUPE_* value is simply re-embedded at
+startup with the bundled model.
+"""
+import argparse
+import json
+import os
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MANIFEST_FILE = "manifest.json"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=os.getenv("ARTIFACT_DIR", os.path.join(BASE_DIR, "artifacts")))
+    parser.add_argument("--catalog", nargs="*", help="catalog ids to bake (default: all in the registry)")
+    parser.add_argument("--reranker", action="store_true", help="also bundle the cross-encoder model")
+    args = parser.parse_args()
+
+    out = os.path.abspath(args.out)
+    # rag reads these at import time: build HNSW indexes and persist them under <out>/indexes
+    os.environ["ARTIFACT_DIR"] = out
+    os.environ["INDEX_MODE"] = "hnsw"
+    os.environ.pop("ANN_INDEX_DIR", None)
+    from Experiments import rag
+    from Experiments.catalogs import load_registry
+    from Experiments.reranker import RERANKER_MODEL
+
+    started = time.perf_counter()
+    os.makedirs(out, exist_ok=True)
+
+    if rag.MODEL_SOURCE != rag.ARTIFACT_MODEL_DIR:
+        rag.model.save(rag.ARTIFACT_MODEL_DIR)
+        print(f"Saved {rag.MODEL_NAME} to {rag.ARTIFACT_MODEL_DIR}")
+
+    reranker_dir = os.path.join(out, "reranker")
+    if args.reranker and not os.path.isdir(reranker_dir):
+        from sentence_transformers import CrossEncoder
+        CrossEncoder(RERANKER_MODEL, device='cpu').save(reranker_dir)
+        print(f"Saved {RERANKER_MODEL} to {reranker_dir}")
+
+    entries = load_registry(fallback_data_path=rag.DATA_PATH)
+    catalogs = {}
+    for catalog_id in args.catalog or list(entries):
+        entry = entries[catalog_id]
+        index = rag.build_index(entry.data_path, index_dir=entry.index_dir)
+        catalogs[catalog_id] = {
+            'version': index.version,
+            'count': index.count,
+            'clusters': index.clusters,
+            'index_dir': os.path.join(entry.index_dir or rag.ANN_INDEX_DIR, rag.persist_key(index.version))
+        }
+
+    manifest = {
+        'built_at': time.time(),
+        'model': {
+            'name': rag.MODEL_NAME,
+            'path': rag.ARTIFACT_MODEL_DIR,
+            'dimension': rag.model.get_sentence_embedding_dimension()
+        },
+        'reranker': {'name': RERANKER_MODEL, 'path': reranker_dir} if os.path.isdir(reranker_dir) else None,
+        'index': {
+            'mode': 'hnsw',
+            'm': rag.HNSW_M,
+            'ef_construction': rag.HNSW_EF_CONSTRUCTION,
+            'ef_search': rag.HNSW_EF_SEARCH,
+            'dedupe_clusters': rag.DEDUPE_CLUSTERS,
+            'dedupe_similarity': rag.DEDUPE_SIMILARITY
+        },
+        'catalogs': catalogs
+    }
+    with open(os.path.join(out, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Artifact written to {out} in {time.perf_counter() - started:.1f}s")
+
+if __name__ == "__main__":
+    main()
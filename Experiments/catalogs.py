@@ -0,0 +1,318 @@
+import contextlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CATALOG_REGISTRY_PATH = os.getenv("CATALOG_REGISTRY_PATH", os.path.join(BASE_DIR, "Data", "catalogs.json"))
+DEFAULT_CATALOG_ID = os.getenv("DEFAULT_CATALOG_ID", "shl")
+CATALOG_MEMORY_BUDGET_MB = float(os.getenv("CATALOG_MEMORY_BUDGET_MB", "512"))
+
+class UnknownCatalog(KeyError):
+    pass
+
+class CatalogEntry:
+    def __init__(self, catalog_id: str, data_path: str, index_dir: str = None, description: str = ""):
+        self.id = catalog_id
+        self.data_path = data_path
+        self.index_dir = index_dir
+        self.description = description
+
+def _resolve_path(path):
+    if not path:
+        return None
+    return path if os.path.isabs(path) else os.path.join(BASE_DIR, path)
+
+def load_registry(path: str = CATALOG_REGISTRY_PATH, fallback_data_path: str = None) -> Dict[str, CatalogEntry]:
+    """Read catalogs.json: {"catalogs": {"<id>": {"data_path": ..., "index_dir": ...}}}.
+
+    Relative paths are resolved against the repo root. Without a registry
+    file the default catalog id maps to fallback_data_path.
+    """
+    if not os.path.exists(path):
+        return {DEFAULT_CATALOG_ID: CatalogEntry(DEFAULT_CATALOG_ID, fallback_data_path)}
+
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    entries = {}
+    for catalog_id, spec in config.get('catalogs', {}).items():
+        entries[catalog_id] = CatalogEntry(
+            catalog_id,
+            _resolve_path(spec['data_path']),
+            index_dir=_resolve_path(spec.get('index_dir')),
+            description=spec.get('description', '')
+        )
+    if DEFAULT_CATALOG_ID not in entries and fallback_data_path:
+        entries[DEFAULT_CATALOG_ID] = CatalogEntry(DEFAULT_CATALOG_ID, fallback_data_path)
+    return entries
+
+def new_reload_status() -> Dict:
+    return {
+        'state': 'idle',
+        'last_version': None,
+        'last_duration_seconds': None,
+        'last_finished_at': None,
+        'last_error': None,
+        'reloads': 0
+    }
+
+class CatalogSlot:
+    def __init__(self, entry: CatalogEntry):
+        self.entry = entry
+        self.active = None
+        self.retired = []
+        # Serializes builds of this catalog; lookups of other catalogs never wait on it
+        self.build_lock = threading.Lock()
+        self.reload_status = new_reload_status()
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+        self.load_seconds = None
+
+class CatalogRegistry:
+    """Catalog id -> index, loaded lazily and evicted LRU under a memory budget.
+
+    Indexes are reference counted: swapping in a reload or evicting a catalog
+    only retires the old index, which is closed once its last in-flight
+    request releases it.
+    """
+
+    def __init__(self, entries: Dict[str, CatalogEntry], build_fn: Callable, version_fn: Callable,
+                 memory_budget_bytes: float = CATALOG_MEMORY_BUDGET_MB * 2**20,
+                 default_id: str = DEFAULT_CATALOG_ID, on_swap: Callable = None):
+        self.build_fn = build_fn
+        self.version_fn = version_fn
+        self.memory_budget_bytes = memory_budget_bytes
+        self.default_id = default_id
+        self.on_swap = on_swap
+        self._slots = {catalog_id: CatalogSlot(entry) for catalog_id, entry in entries.items()}
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+
+    def catalog_ids(self) -> List[str]:
+        return list(self._slots)
+
+    def _slot(self, catalog_id: str = None) -> CatalogSlot:
+        catalog_id = catalog_id or self.default_id
+        slot = self._slots.get(catalog_id)
+        if slot is None:
+            raise UnknownCatalog(f"Unknown catalog '{catalog_id}'")
+        return slot
+
+    def is_loaded(self, catalog_id: str = None) -> bool:
+        return self._slot(catalog_id).active is not None
+
+    def checkout_loaded(self, catalog_id: str = None):
+        """Pin the active index if the catalog is loaded, else None. Never builds, so safe on an event loop."""
+        slot = self._slot(catalog_id)
+        with self._lock:
+            if slot.active is None:
+                return None
+            return self._pin_locked(slot)
+
+    def checkout(self, catalog_id: str = None):
+        """Pin the catalog's active index, building it first if needed. Pair with release()."""
+        slot = self._slot(catalog_id)
+        with self._lock:
+            if slot.active is not None:
+                return self._pin_locked(slot)
+
+        with slot.build_lock:
+            with self._lock:
+                # Another request may have finished loading while we waited
+                if slot.active is not None:
+                    return self._pin_locked(slot)
+            slot.misses += 1
+            print(f"Lazily loading catalog '{slot.entry.id}'...")
+            index = self._build(slot)
+            with self._lock:
+                self._install_locked(slot, index)
+                pinned = self._pin_locked(slot, count_hit=False)
+                to_close = self._evict_locked(keep=slot.entry.id)
+            self._close(to_close)
+            return pinned
+
+    def _pin_locked(self, slot: CatalogSlot, count_hit: bool = True):
+        index = slot.active
+        index.active_requests += 1
+        if count_hit:
+            slot.hits += 1
+        self._lru.move_to_end(slot.entry.id)
+        return index
+
+    def release(self, index):
+        with self._lock:
+            index.active_requests -= 1
+            to_close = self._idle_retired_locked()
+        self._close(to_close)
+
+    @contextlib.contextmanager
+    def acquire(self, catalog_id: str = None):
+        index = self.checkout(catalog_id)
+        try:
+            yield index
+        finally:
+            self.release(index)
+
+    @contextlib.contextmanager
+    def hold(self, index):
+        """Keep a specific (possibly retired) index open, e.g. for work shared across requests."""
+        with self._lock:
+            if index.closed:
+                raise RuntimeError(f"Catalog index {index.version} was already closed")
+            index.active_requests += 1
+        try:
+            yield index
+        finally:
+            self.release(index)
+
+    def _build(self, slot: CatalogSlot):
+        started = time.perf_counter()
+        index = self.build_fn(slot.entry)
+        slot.load_seconds = round(time.perf_counter() - started, 3)
+        slot.loads += 1
+        return index
+
+    def _install_locked(self, slot: CatalogSlot, index):
+        old_index = slot.active
+        slot.active = index
+        if old_index is not None and old_index is not index:
+            slot.retired.append(old_index)
+        self._lru[slot.entry.id] = True
+        self._lru.move_to_end(slot.entry.id)
+
+    def _memory_locked(self) -> int:
+        return sum(slot.active.memory_bytes() for slot in self._slots.values() if slot.active is not None)
+
+    def _evict_locked(self, keep: str) -> list:
+        while self._memory_locked() > self.memory_budget_bytes:
+            victim = next((catalog_id for catalog_id in self._lru if catalog_id != keep), None)
+            if victim is None:
+                break
+            slot = self._slots[victim]
+            del self._lru[victim]
+            print(f"Evicting catalog '{victim}' to stay within the memory budget")
+            slot.retired.append(slot.active)
+            slot.active = None
+            slot.evictions += 1
+        return self._idle_retired_locked()
+
+    def _idle_retired_locked(self) -> list:
+        idle = []
+        for slot in self._slots.values():
+            for index in [index for index in slot.retired if index.active_requests == 0]:
+                slot.retired.remove(index)
+                index.closed = True
+                idle.append(index)
+        return idle
+
+    @staticmethod
+    def _close(indexes: list):
+        for index in indexes:
+            index.close()
+
+    def reload(self, catalog_id: str = None, force: bool = False) -> Dict:
+        slot = self._slot(catalog_id)
+        status = slot.reload_status
+        if not slot.build_lock.acquire(blocking=False):
+            print(f"Build of catalog '{slot.entry.id}' already in progress, skipping")
+            return dict(status)
+
+        try:
+            data_path = slot.entry.data_path
+            if not data_path or not os.path.exists(data_path):
+                raise FileNotFoundError(f"Catalog not found at {data_path}")
+
+            active = slot.active
+            if not force and active is not None and active.version == self.version_fn(data_path):
+                print(f"Catalog '{slot.entry.id}' version {active.version} is already active, skipping reload")
+                return dict(status)
+
+            status['state'] = 'running'
+            status['last_error'] = None
+            started = time.perf_counter()
+
+            new_index = self._build(slot)
+            with self._lock:
+                self._install_locked(slot, new_index)
+                to_close = self._evict_locked(keep=slot.entry.id)
+            self._close(to_close)
+            if self.on_swap is not None:
+                self.on_swap()
+
+            status['last_duration_seconds'] = round(time.perf_counter() - started, 3)
+            status['last_version'] = new_index.version
+            status['reloads'] += 1
+            status['state'] = 'idle'
+            print(f"Catalog '{slot.entry.id}' version {new_index.version} is now active ({status['last_duration_seconds']}s)")
+        except Exception as e:
+            status['state'] = 'failed'
+            status['last_error'] = str(e)
+            print(f"Catalog '{slot.entry.id}' reload failed, keeping the current index: {e}")
+        finally:
+            status['last_finished_at'] = time.time()
+            slot.build_lock.release()
+
+        return dict(status)
+
+    def reload_status(self, catalog_id: str = None) -> Dict:
+        return dict(self._slot(catalog_id).reload_status)
+
+    def start_watcher(self, interval: float) -> threading.Thread:
+        """Poll the data files of loaded catalogs and reload the ones that changed."""
+        def mtime(path):
+            try:
+                return os.path.getmtime(path)
+            except (OSError, TypeError):
+                return None
+
+        def watch():
+            last_mtimes = {catalog_id: mtime(slot.entry.data_path) for catalog_id, slot in self._slots.items()}
+            while True:
+                time.sleep(interval)
+                for catalog_id, slot in self._slots.items():
+                    current = mtime(slot.entry.data_path)
+                    if current is None or current == last_mtimes.get(catalog_id):
+                        continue
+                    last_mtimes[catalog_id] = current
+                    # Unloaded catalogs pick up the new file on their next lazy load
+                    if slot.active is not None:
+                        print(f"Detected change in {slot.entry.data_path}, reloading catalog '{catalog_id}'...")
+                        self.reload(catalog_id)
+
+        watcher = threading.Thread(target=watch, name="catalog-watcher", daemon=True)
+        watcher.start()
+        return watcher
+
+    def stats(self) -> Dict:
+        with self._lock:
+            catalogs = {}
+            for catalog_id, slot in self._slots.items():
+                lookups = slot.hits + slot.misses
+                catalogs[catalog_id] = {
+                    'data_path': slot.entry.data_path,
+                    'loaded': slot.active is not None,
+                    'active_index': slot.active.info() if slot.active is not None else None,
+                    'retired_indexes': [index.info() for index in slot.retired],
+                    'memory_bytes': slot.active.memory_bytes() if slot.active is not None else 0,
+                    'load_seconds': slot.load_seconds,
+                    'loads': slot.loads,
+                    'hits': slot.hits,
+                    'misses': slot.misses,
+                    'hit_rate': round(slot.hits / lookups, 4) if lookups else None,
+                    'evictions': slot.evictions,
+                    'reload': dict(slot.reload_status)
+                }
+            return {
+                'default_catalog': self.default_id,
+                'memory_budget_bytes': int(self.memory_budget_bytes),
+                'memory_bytes': self._memory_locked(),
+                'loaded_lru_order': list(self._lru),
+                'catalogs': catalogs
+            }
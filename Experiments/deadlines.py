@@ -0,0 +1,9 @@
+import time
+
+class DeadlineExceeded(Exception):
+    pass
+
+def check_deadline(deadline: float = None, stage: str = ""):
+    # Deadlines are absolute time.monotonic() values set by the API layer
+    if deadline is not None and time.monotonic() > deadline:
+        raise DeadlineExceeded(f"Deadline exceeded before {stage}")
@@ -0,0 +1,123 @@
+import os
+import re
+from collections import defaultdict
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+# Collapse near-duplicate assessments (versions and level variants of one test)
+# so they take a single slot in the candidate pool; the other variants only
+# back-fill the results once every distinct assessment has been considered
+DEDUPE_CLUSTERS = os.getenv("DEDUPE_CLUSTERS", "1") == "1"
+DEDUPE_SIMILARITY = float(os.getenv("DEDUPE_SIMILARITY", "0.85"))
+# How many more neighbours to fetch so the pool still holds VECTOR_SEARCH_RESULTS clusters
+DEDUPE_OVERFETCH = int(os.getenv("DEDUPE_OVERFETCH", "2"))
+
+NAME_NOISE = [
+    re.compile(r'\((new|adaptive|sim|r\d+)\)'),
+    re.compile(r'\b(entry|advanced|intermediate|basic|beginner|expert)[\s-]*level\b'),
+    re.compile(r'\b(advanced|intermediate|basic|beginner|expert|junior|senior)\b'),
+    re.compile(r'\s-\s(us|uk|u\.s\.|international)\b'),
+    re.compile(r'\bv?\d+(\.\d+)*\b'),
+]
+
+def name_key(name: str) -> str:
+    """Assessment name without version numbers, level words and catalog tags.
+
+    'Core Java (Advanced Level) (New)' and 'Core Java (Entry Level) (New)'
+    both become 'core java'.
+    """
+    key = name.lower()
+    for pattern in NAME_NOISE:
+        key = pattern.sub(' ', key)
+    words = re.sub(r'[^a-z0-9#+]+', ' ', key).split()
+    # Crude plural folding so "Communication" and "Communications" meet
+    return ' '.join(w[:-1] if len(w) > 3 and w.endswith('s') and not w.endswith('ss') else w for w in words)
+
+def name_groups(names: List[str]) -> List[List[int]]:
+    """Positions of items sharing a name key, only for keys with more than one item."""
+    groups = defaultdict(list)
+    for i, name in enumerate(names):
+        key = name_key(name)
+        if key:
+            groups[key].append(i)
+    return [members for members in groups.values() if len(members) > 1]
+
+def cluster_near_duplicates(names: List[str], documents: List[str], encode: Callable,
+                            threshold: float = DEDUPE_SIMILARITY, batch_size: int = 32) -> Tuple[List[int], Dict]:
+    """Cluster id per item: the position of the first item of its cluster.
+
+    Two items are near-duplicates when their names normalize to the same key
+    and their document embeddings have cosine similarity >= threshold. Only
+    items in a shared name group are embedded, so this stays cheap on large
+    catalogs.
+    """
+    parent = list(range(len(names)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    groups = name_groups(names)
+    for members in groups:
+        embeddings = np.vstack([
+            encode([documents[i] for i in members[start:start + batch_size]])
+            for start in range(0, len(members), batch_size)
+        ]).astype(np.float32)
+        embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        similar = embeddings @ embeddings.T >= threshold
+        for a in range(len(members)):
+            for b in range(a + 1, len(members)):
+                if similar[a, b]:
+                    root_a, root_b = find(members[a]), find(members[b])
+                    if root_a != root_b:
+                        parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    cluster_ids = [find(i) for i in range(len(names))]
+    sizes = defaultdict(int)
+    for cluster_id in cluster_ids:
+        sizes[cluster_id] += 1
+    stats = {
+        'items': len(names),
+        'clusters': len(sizes),
+        'name_groups': len(groups),
+        'largest_cluster': max(sizes.values(), default=0)
+    }
+    return cluster_ids, stats
+
+def cluster_of(candidate: Dict):
+    # Indexes built before clustering have no cluster_id; every item is its own cluster
+    cluster_id = candidate.get('cluster_id')
+    return cluster_id if cluster_id is not None else candidate.get('url')
+
+def nearest_clusters(candidates: List[Tuple[Dict, float]], depth: int) -> List[Tuple[Dict, float]]:
+    """Keep every fetched member of the `depth` nearest clusters, in distance order."""
+    kept = set()
+    for candidate, _ in candidates:
+        if len(kept) == depth:
+            break
+        kept.add(cluster_of(candidate))
+    return [(candidate, distance) for candidate, distance in candidates if cluster_of(candidate) in kept]
+
+def collapse_clusters(scored_candidates: List[Tuple]) -> List[Tuple]:
+    """Best-scoring member of each cluster, then the remaining members.
+
+    Expects candidates sorted by score. The remaining members keep their
+    relative order but are rescored below the weakest representative, so
+    they stay behind every distinct assessment when the list is re-sorted.
+    """
+    seen = set()
+    collapsed, siblings = [], []
+    for score, candidate in scored_candidates:
+        cluster_id = cluster_of(candidate)
+        if cluster_id in seen:
+            siblings.append(candidate)
+        else:
+            seen.add(cluster_id)
+            collapsed.append((score, candidate))
+    if not siblings:
+        return collapsed
+    floor = collapsed[-1][0]
+    return collapsed + [(floor - 1 - rank, candidate) for rank, candidate in enumerate(siblings)]
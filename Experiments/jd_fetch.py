@@ -0,0 +1,172 @@
+import hashlib
+import ipaddress
+import os
+import socket
+import time
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Re-exported: callers check is_url before fetch_jd_text
+from Experiments.normalize import is_url
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+JD_CACHE_DIR = os.getenv("JD_CACHE_DIR", os.path.join(BASE_DIR, ".cache", "jd"))
+JD_CACHE_TTL = int(os.getenv("JD_CACHE_TTL", str(24 * 3600)))
+JD_FETCH_TIMEOUT = float(os.getenv("JD_FETCH_TIMEOUT", "5"))
+JD_FETCH_MAX_BYTES = int(os.getenv("JD_FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+JD_CACHE_MAX_FILES = int(os.getenv("JD_CACHE_MAX_FILES", "1000"))
+JD_MAX_REDIRECTS = int(os.getenv("JD_MAX_REDIRECTS", "5"))
+# Only for local benchmarks against a stub server; never enable on a public deployment
+JD_ALLOW_PRIVATE_HOSTS = os.getenv("JD_ALLOW_PRIVATE_HOSTS", "0") == "1"
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (compatible; shl-assessment-recommender/1.0)'
+}
+
+# One pooled session for the whole process so repeated JD fetches reuse
+# keep-alive connections instead of paying a TCP/TLS handshake every time.
+_session = requests.Session()
+_session.headers.update(HEADERS)
+_adapter = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+)
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+
+class BlockedURL(ValueError):
+    pass
+
+def _is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split('%')[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+def check_public_url(url: str):
+    """Refuse URLs whose host resolves to a loopback, private, link-local or otherwise internal address.
+
+    /recommend fetches whatever URL a caller sends, so without this check it
+    could be used to reach localhost, the internal network or cloud metadata
+    endpoints from the server.
+    """
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise BlockedURL(f"Unsupported URL: {url}")
+    if JD_ALLOW_PRIVATE_HOSTS:
+        return
+    try:
+        infos = socket.getaddrinfo(parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80),
+                                   proto=socket.IPPROTO_TCP)
+    except socket.gaierror as e:
+        raise BlockedURL(f"Cannot resolve {parts.hostname}: {e}")
+    addresses = {info[4][0] for info in infos}
+    if not addresses or not all(_is_public_address(address) for address in addresses):
+        raise BlockedURL(f"Refusing to fetch {url}: host resolves to a non-public address")
+
+def _cache_path(url: str) -> str:
+    return os.path.join(JD_CACHE_DIR, hashlib.sha256(url.encode('utf-8')).hexdigest() + ".txt")
+
+def _read_cache(url: str):
+    path = _cache_path(url)
+    try:
+        if time.time() - os.path.getmtime(path) > JD_CACHE_TTL:
+            os.remove(path)
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except OSError:
+        return None
+
+def cache_expires_in(url: str) -> float:
+    """Seconds until the cached JD for url expires; JD_CACHE_TTL when it is not cached."""
+    try:
+        return max(JD_CACHE_TTL - (time.time() - os.path.getmtime(_cache_path(url))), 0)
+    except OSError:
+        return JD_CACHE_TTL
+
+def _write_cache(url: str, text: str):
+    try:
+        os.makedirs(JD_CACHE_DIR, exist_ok=True)
+        path = _cache_path(url)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        _prune_cache()
+    except OSError as e:
+        print(f"Could not cache JD for {url}: {e}")
+
+def _prune_cache(max_files: int = None):
+    """Drop expired entries, then the oldest ones beyond JD_CACHE_MAX_FILES."""
+    max_files = JD_CACHE_MAX_FILES if max_files is None else max_files
+    entries = []
+    for name in os.listdir(JD_CACHE_DIR):
+        if not name.endswith('.txt'):
+            continue
+        path = os.path.join(JD_CACHE_DIR, name)
+        try:
+            entries.append((os.path.getmtime(path), path))
+        except OSError:
+            continue
+    entries.sort()
+    now = time.time()
+    excess = len(entries) - max_files
+    for i, (mtime, path) in enumerate(entries):
+        if i < excess or now - mtime > JD_CACHE_TTL:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+def html_to_text(html: str) -> str:
+    soup = BeautifulSoup(html, 'html.parser')
+    for tag in soup(['script', 'style', 'noscript', 'header', 'footer', 'nav']):
+        tag.decompose()
+    lines = [line.strip() for line in soup.get_text(separator='\n').splitlines()]
+    return '\n'.join(line for line in lines if line)
+
+def _get_checked(url: str, timeout: float):
+    """GET that validates the target host before the first request and after every redirect."""
+    current = url
+    for _ in range(JD_MAX_REDIRECTS + 1):
+        check_public_url(current)
+        response = _session.get(current, timeout=timeout, stream=True, allow_redirects=False)
+        if not response.is_redirect:
+            return response
+        response.close()
+        current = urljoin(current, response.headers['Location'])
+    raise BlockedURL(f"Too many redirects fetching {url}")
+
+def fetch_jd_text(url: str, timeout: float = JD_FETCH_TIMEOUT, max_bytes: int = JD_FETCH_MAX_BYTES) -> str:
+    url = url.strip()
+    cached = _read_cache(url)
+    if cached is not None:
+        return cached
+
+    deadline = time.monotonic() + timeout
+    response = _get_checked(url, timeout)
+    chunks, size = [], 0
+    with response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=16384):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes:
+                print(f"JD at {url} exceeds {max_bytes} bytes, truncating")
+                break
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Fetching {url} took longer than {timeout}s")
+        encoding = response.encoding or 'utf-8'
+        content_type = response.headers.get('Content-Type', '')
+
+    body = b''.join(chunks)[:max_bytes].decode(encoding, errors='replace')
+    text = html_to_text(body) if 'html' in content_type or '<html' in body[:1000].lower() else body.strip()
+    _write_cache(url, text)
+    return text
@@ -0,0 +1,13 @@
+import re
+
+URL_PATTERN = re.compile(r'^https?://\S+$', re.IGNORECASE)
+
+def is_url(text: str) -> bool:
+    return bool(text) and bool(URL_PATTERN.match(text.strip()))
+
+def normalize_query(query: str) -> str:
+    # Shared key for the result cache, ETags, coalescing and the query log.
+    # URL paths and query strings are case-sensitive, so URLs are kept verbatim.
+    if is_url(query):
+        return query.strip()
+    return ' '.join(query.lower().split())
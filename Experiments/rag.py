@@ -8,6 +8,22 @@ from typing import List, Dict, Tuple
 from collections import defaultdict
 import numpy as np
 import gc  # <--- IMPORTANT: Added for memory management
+import hashlib
+import threading
+import time
+import itertools
+from collections import OrderedDict
+
+from Experiments.jd_fetch import is_url, fetch_jd_text, cache_expires_in
+from Experiments.deadlines import DeadlineExceeded, check_deadline
+from Experiments.normalize import normalize_query
+from Experiments.ann_index import AnnIndex, HNSW_M, HNSW_EF_CONSTRUCTION, HNSW_EF_SEARCH
+from Experiments.catalogs import CatalogRegistry, load_registry
+from Experiments.reranker import CrossEncoderReranker
+from Experiments.dedupe import (
+    DEDUPE_CLUSTERS, DEDUPE_SIMILARITY, DEDUPE_OVERFETCH,
+    cluster_near_duplicates, cluster_of, nearest_clusters, collapse_clusters
+)
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_PATH = os.path.join(BASE_DIR, "Data", "shl_data.json")
@@ -19,22 +35,38 @@ GEMINI_MODEL = "gemini-1.5-flash-latest"
 # IMPORTANT: Reduced batch size to prevent Out of Memory (OOM) crashes on Render Free Tier
 BATCH_SIZE = 5 
 VECTOR_SEARCH_RESULTS = 50
+COLLECTION_NAME = "shl_assessments"
+# Baked by `python -m Experiments.build_artifact`: the embedding model plus
+# persisted HNSW indexes, so startup needs neither the network nor re-embedding
+ARTIFACT_DIR = os.getenv("ARTIFACT_DIR")
+ARTIFACT_MODEL_DIR = os.path.join(ARTIFACT_DIR, "model") if ARTIFACT_DIR else None
+# "chroma" keeps vectors in the Chroma collection; "hnsw" serves them from an
+# in-process HNSW graph that can be persisted and scales to large catalogs
+INDEX_MODE = os.getenv("INDEX_MODE", "hnsw" if ARTIFACT_DIR else "chroma").lower()
+ANN_INDEX_DIR = os.getenv("ANN_INDEX_DIR", os.path.join(ARTIFACT_DIR, "indexes") if ARTIFACT_DIR else None)
+ANN_METADATA_FILE = "metadatas.json"
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "1024"))
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))
+# Optional cross-encoder pass over the top candidates (see Experiments/reranker.py)
+ENABLE_RERANKER = os.getenv("ENABLE_RERANKER", "0") == "1"
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "8192"))
+# Long JDs are split into chunks that fit the encoder instead of being truncated
+CHUNK_LONG_QUERIES = os.getenv("CHUNK_LONG_QUERIES", "1") == "1"
+MAX_QUERY_CHUNKS = int(os.getenv("MAX_QUERY_CHUNKS", "16"))
 
 print("Initializing SHL Assessment Recommender...")
 
 print("Loading embedding model...")
+if ARTIFACT_MODEL_DIR and os.path.isdir(ARTIFACT_MODEL_DIR):
+    MODEL_SOURCE = ARTIFACT_MODEL_DIR
+    print(f"Using bundled model from {MODEL_SOURCE}")
+else:
+    MODEL_SOURCE = MODEL_NAME
 # Force CPU device to avoid looking for GPU drivers
-model = SentenceTransformer(MODEL_NAME, device='cpu')
+model = SentenceTransformer(MODEL_SOURCE, device='cpu')
 
 client = chromadb.Client()
 
-try:
-    collection = client.get_collection(name="shl_assessments")
-    print("Loaded existing vector database")
-except:
-    collection = client.create_collection(name="shl_assessments")
-    print("Created new vector database")
-
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 if GEMINI_API_KEY:
     genai.configure(api_key=GEMINI_API_KEY)
@@ -85,7 +117,48 @@ TEST_TYPE_MAPPING = {
     'E': 'Assessment Exercises'
 }
 
-def extract_query_keywords(query: str) -> Dict:
+# Hand-set weights of the rerank formula in get_balanced_recommendations and of
+# the K/P split used by balance_recommendations. Evaluation/tune_weights.py
+# searches these offline and writes overrides to RERANK_WEIGHTS_PATH.
+DEFAULT_RERANK_WEIGHTS = {
+    'distance': 30,
+    'skill_name': 30,
+    'skill_description': 20,
+    'skill_skills': 15,
+    'skill_cap': 100,
+    'experience_match': 25,
+    'experience_penalty': 30,
+    'duration_exact': 30,
+    'duration_within_10': 20,
+    'duration_within_20': 10,
+    'duration_within_30': 5,
+    'duration_far': -10,
+    'test_type_scale': 0.5,
+    'keyword_density': 40,
+    'split_default_k': 50,
+    'split_technical_k': 70,
+    'split_managerial_k': 40,
+}
+RERANK_WEIGHTS_PATH = os.getenv("RERANK_WEIGHTS_PATH", os.path.join(BASE_DIR, "Data", "rerank_weights.json"))
+
+def load_rerank_weights(path: str = RERANK_WEIGHTS_PATH) -> Dict:
+    weights = dict(DEFAULT_RERANK_WEIGHTS)
+    if not os.path.exists(path):
+        return weights
+    with open(path, 'r', encoding='utf-8') as f:
+        overrides = json.load(f)
+    overrides = overrides.get('weights', overrides)
+    unknown = set(overrides) - set(DEFAULT_RERANK_WEIGHTS)
+    if unknown:
+        print(f"Ignoring unknown rerank weights: {', '.join(sorted(unknown))}")
+    weights.update({k: v for k, v in overrides.items() if k in DEFAULT_RERANK_WEIGHTS})
+    print(f"Loaded rerank weights from {path}")
+    return weights
+
+rerank_weights = load_rerank_weights()
+
+def extract_query_keywords(query: str, weights: Dict = None) -> Dict:
+    weights = weights or rerank_weights
     query_lower = query.lower()
     found_skills = []
     for skill, keywords in SKILL_KEYWORDS.items():
@@ -118,14 +191,15 @@ def extract_query_keywords(query: str) -> Dict:
             except:
                 pass
 
-    test_type_pref = {'K': 50, 'P': 50}
+    split_k = weights['split_default_k']
     technical_skills = ['sql', 'python', 'java', 'javascript', 'testing', 'cloud', 'data_analysis']
     if any(skill in found_skills for skill in technical_skills):
-        test_type_pref = {'K': 70, 'P': 30}
+        split_k = weights['split_technical_k']
 
     managerial_skills = ['leadership', 'manager', 'communication', 'sales', 'marketing']
     if any(skill in found_skills for skill in managerial_skills):
-        test_type_pref = {'K': 40, 'P': 60}
+        split_k = weights['split_managerial_k']
+    test_type_pref = {'K': split_k, 'P': 100 - split_k}
 
     return {
         'skills': found_skills,
@@ -135,10 +209,11 @@ def extract_query_keywords(query: str) -> Dict:
         'original_query': query
     }
 
-def score_skill_match(query_skills: List[str], candidate: Dict) -> float:
+def score_skill_match(query_skills: List[str], candidate: Dict, weights: Dict = None) -> float:
     if not query_skills:
         return 0
 
+    weights = weights or rerank_weights
     candidate_text = f"{candidate['name']} {candidate['description']}".lower()
     candidate_skills = candidate.get('skills', '').lower()
     score = 0
@@ -148,52 +223,55 @@ def score_skill_match(query_skills: List[str], candidate: Dict) -> float:
             for keyword in SKILL_KEYWORDS[skill]:
                 if keyword in candidate_text:
                     if keyword in candidate['name'].lower():
-                        score += 30
+                        score += weights['skill_name']
                     elif keyword in candidate['description'].lower():
-                        score += 20
+                        score += weights['skill_description']
                     elif keyword in candidate_skills:
-                        score += 15
+                        score += weights['skill_skills']
 
-    return min(score, 100)
+    return min(score, weights['skill_cap'])
 
-def score_experience_match(query_level: str, candidate: Dict) -> float:
+def score_experience_match(query_level: str, candidate: Dict, weights: Dict = None) -> float:
+    weights = weights or rerank_weights
     candidate_name = candidate['name'].lower()
     level_keywords = EXPERIENCE_LEVELS.get(query_level, [])
     score = 0
 
     for keyword in level_keywords:
         if keyword in candidate_name:
-            score += 25
+            score += weights['experience_match']
 
     if query_level == 'entry':
         if any(term in candidate_name for term in EXPERIENCE_LEVELS['senior']):
-            score -= 30
+            score -= weights['experience_penalty']
     elif query_level == 'senior':
         if any(term in candidate_name for term in EXPERIENCE_LEVELS['entry']):
-            score -= 30
+            score -= weights['experience_penalty']
 
     return score
 
-def score_duration_match(query_duration: int, candidate_duration: int) -> float:
+def score_duration_match(query_duration: int, candidate_duration: int, weights: Dict = None) -> float:
     if not query_duration:
         return 0
 
+    weights = weights or rerank_weights
     diff = abs(query_duration - candidate_duration)
     if diff == 0:
-        return 30
+        return weights['duration_exact']
     elif diff <= 10:
-        return 20
+        return weights['duration_within_10']
     elif diff <= 20:
-        return 10
+        return weights['duration_within_20']
     elif diff <= 30:
-        return 5
+        return weights['duration_within_30']
     else:
-        return -10
+        return weights['duration_far']
 
-def score_test_type_match(query_test_pref: Dict, candidate_types) -> float:
+def score_test_type_match(query_test_pref: Dict, candidate_types, weights: Dict = None) -> float:
     if not candidate_types:
         return 0
 
+    weights = weights or rerank_weights
     if isinstance(candidate_types, str):
         cand_types = [t.strip() for t in candidate_types.split(',')]
     elif isinstance(candidate_types, list):
@@ -204,17 +282,18 @@ def score_test_type_match(query_test_pref: Dict, candidate_types) -> float:
     score = 0
     for test_type, weight in query_test_pref.items():
         if test_type in cand_types:
-            score += weight * 0.5
+            score += weight * weights['test_type_scale']
 
     return score
 
-def score_keyword_density(query: str, candidate: Dict) -> float:
+def score_keyword_density(query: str, candidate: Dict, weights: Dict = None) -> float:
+    weights = weights or rerank_weights
     query_words = set([w.lower() for w in query.split() if len(w) > 3])
     candidate_text = f"{candidate['name']} {candidate['description']}".lower()
     candidate_words = set(candidate_text.split())
     overlap = len(query_words.intersection(candidate_words))
     if len(query_words) > 0:
-        return (overlap / len(query_words)) * 40
+        return (overlap / len(query_words)) * weights['keyword_density']
     return 0
 
 def enrich_assessment_data(item: Dict) -> Dict:
@@ -240,27 +319,167 @@ def enrich_assessment_data(item: Dict) -> Dict:
 
     return enriched
 
-def ingest_data():
-    if not os.path.exists(DATA_PATH):
-        print(f"Error: shl_data.json not found at {DATA_PATH}")
-        return 0
-
-    print("Loading assessment data...")
-
+class LRUCache:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        # Monotonic expiry times for entries put with a ttl
+        self._expires = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                expires = self._expires.get(key)
+                if expires is not None and time.monotonic() >= expires:
+                    del self._data[key]
+                    del self._expires[key]
+                else:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return self._data[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value, ttl: float = None):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if ttl is not None:
+                self._expires[key] = time.monotonic() + ttl
+            else:
+                self._expires.pop(key, None)
+            while len(self._data) > self.maxsize:
+                evicted, _ = self._data.popitem(last=False)
+                self._expires.pop(evicted, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+# Results are keyed by (catalog version, normalized query, top_k), so a reload
+# never serves recommendations computed against an older catalog.
+result_cache = LRUCache(RESULT_CACHE_SIZE)
+# Query embeddings only depend on the model, so they survive catalog reloads.
+# They are keyed on the text encode_query actually chunks (see encoding_text).
+embedding_cache = LRUCache(EMBEDDING_CACHE_SIZE)
+
+reranker = None
+if ENABLE_RERANKER:
+    reranker = CrossEncoderReranker(cache=LRUCache(RERANK_CACHE_SIZE))
+    # Load and time the model now rather than inside the first request's
+    # budget; a model that is neither bundled nor reachable (e.g. with
+    # HF_HUB_OFFLINE=1) must stop startup, not fail every reranked request
     try:
-        with open(DATA_PATH, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        reranker.calibrate()
+    except Exception as e:
+        raise RuntimeError(
+            f"ENABLE_RERANKER=1 but the reranker model '{reranker.model_name}' could not be loaded: {e}. "
+            "Bundle it with `python -m Experiments.build_artifact --reranker`, point RERANKER_MODEL "
+            "at a local copy, or allow hub downloads (unset HF_HUB_OFFLINE)."
+        ) from e
+
+def catalog_version(data_path: str = DATA_PATH) -> str:
+    digest = hashlib.sha256()
+    with open(data_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+def load_catalog(data_path: str = DATA_PATH) -> List[Dict]:
+    try:
+        with open(data_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
     except UnicodeDecodeError:
-        with open(DATA_PATH, 'r', encoding='latin-1') as f:
-            data = json.load(f)
-
-    print(f"Loaded {len(data)} assessments")
+        with open(data_path, 'r', encoding='latin-1') as f:
+            return json.load(f)
+
+class CatalogIndex:
+    """One immutable, fully built vector index for a single catalog version."""
+
+    def __init__(self, version: str, data_path: str, build_seconds: float,
+                 collection=None, ann: AnnIndex = None, metadatas: List[Dict] = None):
+        self.collection = collection
+        self.ann = ann
+        self.metadatas = metadatas
+        self.version = version
+        self.data_path = data_path
+        self.build_seconds = build_seconds
+        self.built_at = time.time()
+        self.count = len(ann) if ann is not None else collection.count()
+        self.metadata_bytes = len(json.dumps(metadatas)) if metadatas else 0
+        self.clusters = len({cluster_of(m) for m in metadatas}) if metadatas else self.count
+        self.active_requests = 0
+        self.closed = False
+
+    @property
+    def mode(self) -> str:
+        return 'hnsw' if self.ann is not None else 'chroma'
+
+    def search(self, query_embeddings: List[List[float]], n_results: int) -> Dict:
+        if self.ann is not None:
+            labels, distances = self.ann.query(query_embeddings, n_results)
+            return {
+                'metadatas': [[self.metadatas[i] for i in row] for row in labels.tolist()],
+                'distances': distances.tolist()
+            }
+        return self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=n_results,
+            include=["metadatas", "distances"]
+        )
 
+    def close(self):
+        if self.collection is None:
+            return
+        try:
+            client.delete_collection(name=self.collection.name)
+        except Exception as e:
+            print(f"Could not drop collection {self.collection.name}: {e}")
+
+    def memory_bytes(self) -> int:
+        if self.ann is not None:
+            return self.ann.memory_bytes() + self.metadata_bytes
+        # Chroma keeps the vectors, its own HNSW links, metadata and documents
+        dim = model.get_sentence_embedding_dimension()
+        return self.count * (dim * 4 + 2 * HNSW_M * 4) + 2 * self.metadata_bytes
+
+    def info(self) -> Dict:
+        info = {
+            'version': self.version,
+            'mode': self.mode,
+            'count': self.count,
+            'clusters': self.clusters,
+            'data_path': self.data_path,
+            'build_seconds': round(self.build_seconds, 3),
+            'built_at': self.built_at,
+            'active_requests': self.active_requests,
+            'memory_bytes': self.memory_bytes()
+        }
+        if self.ann is not None:
+            info['ef_search'] = self.ann.ef_search
+        return info
+
+_build_sequence = itertools.count(1)
+
+def prepare_documents(data: List[Dict]) -> Tuple[List[str], List[str], List[Dict]]:
     enriched_data = [enrich_assessment_data(item) for item in data]
     ids, documents, metadatas = [], [], []
 
-    print("Preparing documents for embedding...")
-
     for i, item in enumerate(enriched_data):
         doc_text = f"""
         Name: {item['name']}
@@ -282,6 +501,70 @@ def ingest_data():
             'skills': item.get('skills', '')
         })
 
+    return ids, documents, metadatas
+
+def load_persisted_ann(directory: str):
+    if not AnnIndex.exists(directory):
+        return None
+    try:
+        ann = AnnIndex.load(directory, ef_search=HNSW_EF_SEARCH)
+        with open(os.path.join(directory, ANN_METADATA_FILE), 'r', encoding='utf-8') as f:
+            metadatas = json.load(f)
+        return ann, metadatas
+    except Exception as e:
+        print(f"Could not load persisted HNSW index from {directory}: {e}")
+        return None
+
+def persist_key(version: str) -> str:
+    """Directory name of a persisted index: cluster ids are baked into its metadatas."""
+    return f"{version}_dedupe{DEDUPE_SIMILARITY:g}" if DEDUPE_CLUSTERS else f"{version}_nodedupe"
+
+def build_index(data_path: str = DATA_PATH, index_dir: str = None) -> CatalogIndex:
+    started = time.perf_counter()
+    version = catalog_version(data_path)
+    index_dir = index_dir or ANN_INDEX_DIR
+    persist_dir = os.path.join(index_dir, persist_key(version)) if index_dir else None
+
+    if INDEX_MODE == 'hnsw' and persist_dir:
+        persisted = load_persisted_ann(persist_dir)
+        if persisted is not None:
+            ann, metadatas = persisted
+            print(f"Loaded persisted HNSW index for catalog version {version} ({len(ann)} items)")
+            return CatalogIndex(version, data_path, time.perf_counter() - started, ann=ann, metadatas=metadatas)
+
+    print("Loading assessment data...")
+    data = load_catalog(data_path)
+    print(f"Loaded {len(data)} assessments (catalog version {version})")
+
+    print("Preparing documents for embedding...")
+    ids, documents, metadatas = prepare_documents(data)
+
+    if DEDUPE_CLUSTERS:
+        cluster_ids, cluster_stats = cluster_near_duplicates(
+            [m['name'] for m in metadatas], documents, model.encode, threshold=DEDUPE_SIMILARITY
+        )
+        for metadata, cluster_id in zip(metadatas, cluster_ids):
+            metadata['cluster_id'] = cluster_id
+        print(f"Grouped {cluster_stats['items']} assessments into {cluster_stats['clusters']} near-duplicate clusters")
+
+    ann, new_collection = None, None
+    if INDEX_MODE == 'hnsw':
+        ann = AnnIndex(dim=model.get_sentence_embedding_dimension(), max_elements=len(ids))
+        index_name = f"hnsw index (M={ann.m}, ef_construction={ann.ef_construction})"
+    else:
+        # Every build gets its own collection so the active one keeps serving
+        # while the replacement is being embedded.
+        index_name = f"{COLLECTION_NAME}_{version}_{next(_build_sequence)}"
+        new_collection = client.create_collection(
+            name=index_name,
+            metadata={
+                "hnsw:space": "l2",
+                "hnsw:M": HNSW_M,
+                "hnsw:construction_ef": HNSW_EF_CONSTRUCTION,
+                "hnsw:search_ef": HNSW_EF_SEARCH
+            }
+        )
+
     print("Creating embeddings (Optimized for Low RAM)...")
 
     # IMPORTANT: Optimized Loop for Low Memory Environments
@@ -293,18 +576,18 @@ def ingest_data():
         
         # Encode batch
         embeddings = model.encode(batch_docs)
-        
-        # Convert to list if it's a numpy array
-        if hasattr(embeddings, 'tolist'):
-            embeddings = embeddings.tolist()
-
-        # Add to ChromaDB
-        collection.add(
-            ids=ids[start_idx:end_idx],
-            embeddings=embeddings,
-            metadatas=metadatas[start_idx:end_idx],
-            documents=batch_docs
-        )
+
+        if ann is not None:
+            # Incremental insert; labels are positions in `metadatas`
+            ann.add(embeddings, ids=np.arange(start_idx, end_idx))
+        else:
+            # Add to ChromaDB
+            new_collection.add(
+                ids=ids[start_idx:end_idx],
+                embeddings=embeddings.tolist(),
+                metadatas=metadatas[start_idx:end_idx],
+                documents=batch_docs
+            )
         
         print(f"Processed {end_idx}/{len(ids)} assessments")
         
@@ -313,8 +596,143 @@ def ingest_data():
         del batch_docs
         gc.collect()
 
-    print(f"Vector database created with {collection.count()} items")
-    return collection.count()
+    if ann is not None and persist_dir:
+        ann.save(persist_dir)
+        with open(os.path.join(persist_dir, ANN_METADATA_FILE), 'w', encoding='utf-8') as f:
+            json.dump(metadatas, f)
+        print(f"Persisted HNSW index to {persist_dir}")
+
+    build_seconds = time.perf_counter() - started
+    index = CatalogIndex(version, data_path, build_seconds, collection=new_collection, ann=ann, metadatas=metadatas)
+    print(f"Vector index {index_name} created with {index.count} items in {build_seconds:.1f}s")
+    return index
+
+registry = CatalogRegistry(
+    load_registry(fallback_data_path=DATA_PATH),
+    build_fn=lambda entry: build_index(entry.data_path, index_dir=entry.index_dir),
+    version_fn=catalog_version,
+    on_swap=result_cache.clear
+)
+
+def acquire_index(catalog_id: str = None):
+    return registry.acquire(catalog_id)
+
+def hold_index(index: CatalogIndex):
+    return registry.hold(index)
+
+def reload_index(force: bool = False, catalog_id: str = None) -> Dict:
+    return registry.reload(catalog_id, force=force)
+
+def start_catalog_watcher(interval: float) -> threading.Thread:
+    return registry.start_watcher(interval)
+
+def index_stats() -> Dict:
+    return {
+        **registry.stats(),
+        'result_cache': result_cache.stats(),
+        'embedding_cache': embedding_cache.stats(),
+        'reranker': reranker.stats() if reranker is not None else None
+    }
+
+def engine_fingerprint() -> str:
+    """Hash of the settings besides the catalog that change /recommend output.
+
+    Folded into the ETag so a deploy with new weights, reranker or dedupe
+    settings invalidates what clients hold.
+    """
+    settings = {
+        'model': MODEL_NAME,
+        'weights': rerank_weights,
+        'reranker': [reranker.model_name, reranker.top_n] if reranker is not None else None,
+        'dedupe': [DEDUPE_CLUSTERS, DEDUPE_SIMILARITY, DEDUPE_OVERFETCH],
+        'chunking': [CHUNK_LONG_QUERIES, MAX_QUERY_CHUNKS],
+        'search_depth': VECTOR_SEARCH_RESULTS
+    }
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+def ingest_data(catalog_id: str = None):
+    """Eagerly build a catalog's index (the default one unless told otherwise)."""
+    status = reload_index(force=True, catalog_id=catalog_id)
+    if status['state'] == 'failed':
+        print(f"Error: could not build catalog index: {status['last_error']}")
+        return 0
+    with acquire_index(catalog_id) as index:
+        return index.count
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?;:])\s+|\n+')
+
+def split_into_chunks(text: str, max_tokens: int = None) -> List[Tuple[str, int]]:
+    """Pack whole sentences into chunks of at most max_tokens word pieces.
+
+    Returns (chunk_text, token_count) pairs; sentences longer than the limit
+    are split on token boundaries.
+    """
+    if max_tokens is None:
+        # Leave room for the [CLS] and [SEP] tokens the encoder adds
+        max_tokens = model.max_seq_length - 2
+    tokenizer = model.tokenizer
+
+    pieces = []
+    for sentence in SENTENCE_BOUNDARY.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        tokens = tokenizer.tokenize(sentence)
+        if len(tokens) <= max_tokens:
+            pieces.append((sentence, len(tokens)))
+            continue
+        for start in range(0, len(tokens), max_tokens):
+            window = tokens[start:start + max_tokens]
+            pieces.append((tokenizer.convert_tokens_to_string(window), len(window)))
+
+    chunks, current, current_len = [], [], 0
+    for sentence, n_tokens in pieces:
+        if current and current_len + n_tokens > max_tokens:
+            chunks.append((' '.join(current), current_len))
+            current, current_len = [], 0
+        current.append(sentence)
+        current_len += n_tokens
+    if current:
+        chunks.append((' '.join(current), current_len))
+    return chunks
+
+def encoding_text(query: str) -> str:
+    """Query as the encoder sees it: lowercased, whitespace collapsed, line breaks kept.
+
+    The tokenizer is uncased, so this encodes exactly like the raw query, and
+    line breaks survive because split_into_chunks treats them as boundaries.
+    """
+    lines = (' '.join(line.lower().split()) for line in query.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+def encode_query(query: str) -> List[List[float]]:
+    text = encoding_text(query)
+    cache_key = (CHUNK_LONG_QUERIES, text)
+    cached = embedding_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    embedding = _encode_query_uncached(text)
+    embedding_cache.put(cache_key, embedding)
+    return embedding
+
+def _encode_query_uncached(query: str) -> List[List[float]]:
+    if not CHUNK_LONG_QUERIES:
+        return model.encode([query]).tolist()
+
+    chunks = split_into_chunks(query)[:MAX_QUERY_CHUNKS]
+    if len(chunks) <= 1:
+        return model.encode([query]).tolist()
+
+    # One batched forward pass for every chunk, then a token-weighted mean so
+    # each part of the JD contributes in proportion to its length.
+    embeddings = model.encode([text for text, _ in chunks], batch_size=len(chunks))
+    weights = np.array([n_tokens for _, n_tokens in chunks], dtype=np.float32)
+    pooled = (embeddings * weights[:, None]).sum(axis=0) / weights.sum()
+    norm = np.linalg.norm(pooled)
+    if norm > 0:
+        pooled = pooled / norm
+    return [pooled.tolist()]
 
 def balance_recommendations(scored_candidates: List[Tuple], query_analysis: Dict, top_k: int = 10) -> List[Dict]:
     if not scored_candidates:
@@ -353,35 +771,77 @@ def balance_recommendations(scored_candidates: List[Tuple], query_analysis: Dict
 
     return selected[:top_k]
 
-def get_balanced_recommendations(query: str, top_k: int = 10) -> List[Dict]:
+class PartialRecommendations(list):
+    """Recommendations from a degraded run (e.g. reranker budget fallback); never cached or given an ETag."""
+
+def retrieve_candidates(index: CatalogIndex, query_embedding: List[List[float]]) -> List[Tuple[Dict, float]]:
+    """(metadata, distance) pairs nearest to the query.
+
+    With DEDUPE_CLUSTERS the index is over-fetched and every fetched member of
+    the VECTOR_SEARCH_RESULTS nearest clusters is kept, so the pool still spans
+    that many distinct assessments once collapse_clusters ranks one per cluster.
+    """
+    n_results = VECTOR_SEARCH_RESULTS * DEDUPE_OVERFETCH if DEDUPE_CLUSTERS else VECTOR_SEARCH_RESULTS
+    results = index.search(query_embedding, min(n_results, index.count))
+    if not results['metadatas'] or not results['metadatas'][0]:
+        return []
+    candidates = list(zip(results['metadatas'][0], results['distances'][0]))
+    if DEDUPE_CLUSTERS:
+        candidates = nearest_clusters(candidates, VECTOR_SEARCH_RESULTS)
+    return candidates
+
+def get_balanced_recommendations(query: str, top_k: int = 10, catalog_id: str = None) -> List[Dict]:
+    with acquire_index(catalog_id) as index:
+        return recommend_from_index(index, query, top_k)
+
+def recommend_from_index(index: CatalogIndex, query: str, top_k: int = 10, deadline: float = None) -> List[Dict]:
+    """Run the pipeline against one pinned index; the caller holds it via acquire_index."""
     if not query or len(query.strip()) < 3:
         return []
 
     print(f"Processing query: '{query[:80]}...'")
+
+    cache_key = (index.version, normalize_query(query), top_k)
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        print(f"Result cache hit for catalog version {index.version}")
+        return [dict(rec) for rec in cached]
+
+    check_deadline(deadline, "query analysis")
+    # Results for a URL go stale with the fetched JD, so they expire with it
+    result_ttl = None
+    if is_url(query):
+        url = query.strip()
+        try:
+            query = fetch_jd_text(url)
+        except Exception as e:
+            print(f"Could not fetch JD from URL: {e}")
+            return []
+        result_ttl = cache_expires_in(url)
+        print(f"Fetched JD text ({len(query)} chars) from URL")
+
     query_analysis = extract_query_keywords(query)
     print(f"Analysis: {len(query_analysis['skills'])} skills, {query_analysis['experience_level']} level")
 
-    query_embedding = model.encode([query]).tolist()
+    check_deadline(deadline, "encoding")
+    query_embedding = encode_query(query)
+    check_deadline(deadline, "vector search")
 
     try:
-        results = collection.query(
-            query_embeddings=query_embedding,
-            n_results=VECTOR_SEARCH_RESULTS,
-            include=["metadatas", "distances", "documents"]
-        )
+        candidates = retrieve_candidates(index, query_embedding)
     except Exception as e:
         print(f"Vector search error: {e}")
         return []
 
-    if not results['metadatas'] or not results['metadatas'][0]:
+    if not candidates:
         print("No results from vector search")
         return []
 
+    check_deadline(deadline, "reranking")
     scored_candidates = []
-    for i, candidate in enumerate(results['metadatas'][0]):
+    for candidate, distance in candidates:
         total_score = 0
-        distance = results['distances'][0][i]
-        total_score += (1.0 / (1.0 + distance) if distance > 0 else 1.0) * 30
+        total_score += (1.0 / (1.0 + distance) if distance > 0 else 1.0) * rerank_weights['distance']
         total_score += score_skill_match(query_analysis['skills'], candidate)
         total_score += score_experience_match(query_analysis['experience_level'], candidate)
         total_score += score_duration_match(query_analysis['duration'], candidate.get('duration', 30))
@@ -390,6 +850,12 @@ def get_balanced_recommendations(query: str, top_k: int = 10) -> List[Dict]:
         scored_candidates.append((total_score, candidate))
 
     scored_candidates.sort(key=lambda x: x[0], reverse=True)
+    if DEDUPE_CLUSTERS:
+        scored_candidates = collapse_clusters(scored_candidates)
+    complete = True
+    if reranker is not None:
+        query_hash = hashlib.sha256(normalize_query(query).encode('utf-8')).hexdigest()[:16]
+        scored_candidates, complete = reranker.rerank(query, query_hash, scored_candidates, deadline)
     balanced_results = balance_recommendations(scored_candidates, query_analysis, top_k)
 
     final_recommendations = []
@@ -406,7 +872,11 @@ def get_balanced_recommendations(query: str, top_k: int = 10) -> List[Dict]:
         })
 
     print(f"Generated {len(final_recommendations)} balanced recommendations")
-    return final_recommendations
+    if not complete:
+        # A budget fallback must not pin the degraded ranking for this query
+        return PartialRecommendations(final_recommendations)
+    result_cache.put(cache_key, final_recommendations, ttl=result_ttl)
+    return [dict(rec) for rec in final_recommendations]
 
 if __name__ == "__main__":
     print("SHL ASSESSMENT RECOMMENDATION SYSTEM")
@@ -0,0 +1,130 @@
+import os
+import time
+from typing import Dict, List, Tuple
+
+# Prefer the copy bundled by `python -m Experiments.build_artifact --reranker`
+_BUNDLED_RERANKER = os.path.join(os.getenv("ARTIFACT_DIR", ""), "reranker")
+RERANKER_MODEL = os.getenv(
+    "RERANKER_MODEL",
+    _BUNDLED_RERANKER if os.getenv("ARTIFACT_DIR") and os.path.isdir(_BUNDLED_RERANKER)
+    else "cross-encoder/ms-marco-MiniLM-L-6-v2"
+)
+RERANK_TOP_N = int(os.getenv("RERANK_TOP_N", "20"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "150"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "8"))
+RERANK_MAX_LENGTH = 256
+
+class CrossEncoderReranker:
+    """Second-stage reranker over the top-N candidates of the rule-based ordering.
+
+    Pairs are scored in batches. A batch only starts if the measured cost
+    per pair (seeded by calibrate() at startup) says it will finish inside
+    the time budget, and a batch that
+    overruns anyway is discarded; either way the candidates keep their
+    first-stage order and rerank() reports the fallback. Scores are cached
+    per (query hash, assessment URL), so a repeated query only pays for
+    candidates it has not seen before.
+    """
+
+    def __init__(self, cache, model_name: str = RERANKER_MODEL, top_n: int = RERANK_TOP_N,
+                 budget_ms: float = RERANK_BUDGET_MS, batch_size: int = RERANK_BATCH_SIZE):
+        self.cache = cache
+        self.model_name = model_name
+        self.top_n = top_n
+        self.budget_ms = budget_ms
+        self.batch_size = batch_size
+        self._model = None
+        self.runs = 0
+        self.fallbacks = 0
+        self.pairs_scored = 0
+        self.total_ms = 0.0
+        # Moving average of seconds per scored pair, used to predict batch cost
+        self.pair_seconds = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            from sentence_transformers import CrossEncoder
+            print(f"Loading reranker model {self.model_name}...")
+            self._model = CrossEncoder(self.model_name, device='cpu', max_length=RERANK_MAX_LENGTH)
+        return self._model
+
+    @staticmethod
+    def candidate_text(candidate: Dict) -> str:
+        return f"{candidate.get('name', '')}. {candidate.get('description', '')}"
+
+    def calibrate(self):
+        """Time one full batch of dummy pairs so the budget holds from the first request."""
+        document = self.candidate_text({'name': 'Calibration', 'description': 'assessment ' * 100})
+        pairs = [("software developer with sql and stakeholder communication skills", document)] * max(self.batch_size, 1)
+        # The first predict pays one-off warm-up costs that real requests do not
+        self.model.predict(pairs[:1], batch_size=1, show_progress_bar=False)
+        started = time.monotonic()
+        self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False)
+        self.pair_seconds = (time.monotonic() - started) / len(pairs)
+        print(f"Reranker calibrated at {self.pair_seconds * 1000:.2f} ms per pair")
+
+    def rerank(self, query: str, query_hash: str, scored_candidates: List[Tuple],
+               deadline: float = None) -> Tuple[List[Tuple], bool]:
+        """(candidates, complete); complete is False when the budget forced the first-stage order."""
+        if self.top_n <= 0 or len(scored_candidates) < 2:
+            return scored_candidates, True
+
+        started = time.monotonic()
+        budget_end = started + self.budget_ms / 1000
+        if deadline is not None:
+            budget_end = min(budget_end, deadline)
+
+        head = scored_candidates[:self.top_n]
+        scores = [self.cache.get((query_hash, candidate['url'])) for _, candidate in head]
+        missing = [i for i, score in enumerate(scores) if score is None]
+
+        self.runs += 1
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            expected = self.pair_seconds * len(batch) if self.pair_seconds is not None else 0.0
+            if time.monotonic() + expected > budget_end:
+                return self._fall_back(scored_candidates, started, f"next batch would exceed the budget after {start}/{len(missing)} pairs")
+
+            batch_started = time.monotonic()
+            pairs = [(query, self.candidate_text(head[i][1])) for i in batch]
+            batch_scores = self.model.predict(pairs, batch_size=len(pairs), show_progress_bar=False)
+            finished = time.monotonic()
+            pair_seconds = (finished - batch_started) / len(batch)
+            self.pair_seconds = pair_seconds if self.pair_seconds is None else 0.7 * self.pair_seconds + 0.3 * pair_seconds
+
+            # Cached even if this batch overran, so the next request for the query is cheaper
+            for i, score in zip(batch, batch_scores):
+                scores[i] = float(score)
+                self.cache.put((query_hash, head[i][1]['url']), scores[i])
+            self.pairs_scored += len(batch)
+            if finished > budget_end:
+                return self._fall_back(scored_candidates, started, f"batch overran the budget after {start + len(batch)}/{len(missing)} pairs")
+
+        # Keep the head ahead of the tail: balance_recommendations re-sorts by
+        # score when it back-fills, so the new order must survive that sort.
+        order = sorted(range(len(head)), key=lambda i: scores[i], reverse=True)
+        top_score = max(score for score, _ in scored_candidates)
+        reranked = [(top_score + len(head) - rank, head[i][1]) for rank, i in enumerate(order)]
+
+        self.total_ms += (time.monotonic() - started) * 1000
+        return reranked + scored_candidates[self.top_n:], True
+
+    def _fall_back(self, scored_candidates: List[Tuple], started: float, reason: str) -> Tuple[List[Tuple], bool]:
+        self.fallbacks += 1
+        self.total_ms += (time.monotonic() - started) * 1000
+        print(f"Reranker fallback ({reason}), keeping first-stage order")
+        return scored_candidates, False
+
+    def stats(self) -> Dict:
+        return {
+            'model': self.model_name,
+            'top_n': self.top_n,
+            'budget_ms': self.budget_ms,
+            'runs': self.runs,
+            'fallbacks': self.fallbacks,
+            'pairs_scored': self.pairs_scored,
+            'mean_ms': round(self.total_ms / self.runs, 2) if self.runs else None,
+            'pair_ms': round(self.pair_seconds * 1000, 3) if self.pair_seconds is not None else None,
+            'cache': self.cache.stats()
+        }
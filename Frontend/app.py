@@ -1,7 +1,25 @@
+import os
+import sys
+
 import streamlit as st
-import requests
 
-API_URL = "https://shl-assessment-recommender-backend-05je.onrender.com/recommend"
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from Client.api_client import RecommenderClient, RecommenderError
+
+API_URL = os.getenv("RECOMMENDER_API_URL", "https://shl-assessment-recommender-backend-05je.onrender.com")
+
+@st.cache_resource
+def get_client():
+    # The free backend instance can take a while to wake up, so allow a generous read timeout
+    return RecommenderClient(API_URL, timeout=90)
+
+def fetch_recommendations(query: str):
+    # RecommenderClient caches answers itself and skips the empty or degraded
+    # ones the API sends without an ETag; a Streamlit cache here would keep them
+    return get_client().recommend(query)
 
 st.title("SHL Assessment Recommender")
 st.write("Enter a Job Description, a specific query, or a URL to a JD.")
@@ -12,21 +30,17 @@ if st.button("Get Recommendations"):
     if query:
         with st.spinner("Analyzing and finding best assessments..."):
             try:
-                payload = {"query": query}
-                response = requests.post(API_URL, json=payload)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    st.success(f"Found {len(data['recommended_assessments'])} recommendations")
-                    
-                    for item in data['recommended_assessments']:
-                        with st.expander(f"{item['name']}"):
-                            st.write(f"**URL:** [Link]({item['url']})")
-                            st.write(f"**Duration:** {item['duration']} mins")
-                            st.write(f"**Description:** {item['description']}")
-                            st.write(f"**Type:** {', '.join(item['test_type'])}")
-                else:
-                    st.error("Error retrieving recommendations.")
+                recommendations = fetch_recommendations(query.strip())
+                st.success(f"Found {len(recommendations)} recommendations")
+
+                for item in recommendations:
+                    with st.expander(f"{item['name']}"):
+                        st.write(f"**URL:** [Link]({item['url']})")
+                        st.write(f"**Duration:** {item['duration']} mins")
+                        st.write(f"**Description:** {item['description']}")
+                        st.write(f"**Type:** {', '.join(item['test_type'])}")
+            except RecommenderError as e:
+                st.error(f"Error retrieving recommendations: {e}")
             except Exception as e:
                 st.error(f"Connection error: {e}")
     else:
@@ -0,0 +1,81 @@
+import asyncio
+import contextlib
+import os
+import time
+
+# Shared with the pipeline, which checks the same deadline between stages
+from Experiments.deadlines import DeadlineExceeded
+
+MAX_INFLIGHT = int(os.getenv("MAX_INFLIGHT", "2"))
+MAX_QUEUE = int(os.getenv("MAX_QUEUE", "8"))
+RETRY_AFTER_SECONDS = int(os.getenv("RETRY_AFTER_SECONDS", "1"))
+REQUEST_DEADLINE_MS = int(os.getenv("REQUEST_DEADLINE_MS", "10000"))
+
+class Overloaded(Exception):
+    pass
+
+class AdmissionController:
+    """Caps concurrent pipeline runs and the number of requests waiting for one.
+
+    Requests beyond MAX_INFLIGHT + MAX_QUEUE are refused immediately instead of
+    joining an unbounded backlog, and queued requests give up once their
+    deadline passes, so latency stays bounded under overload.
+    """
+
+    def __init__(self, max_inflight: int = MAX_INFLIGHT, max_queue: int = MAX_QUEUE):
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(max_inflight)
+        self.inflight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.expired = 0
+
+    @contextlib.asynccontextmanager
+    async def admit(self, deadline: float | None = None):
+        if deadline is not None and time.monotonic() > deadline:
+            self.expired += 1
+            raise DeadlineExceeded("Deadline passed before admission")
+
+        if not self._semaphore.locked():
+            # A slot is free, so this returns without suspending
+            await self._semaphore.acquire()
+        else:
+            if self.queued >= self.max_queue:
+                self.rejected += 1
+                raise Overloaded("Too many queued recommendation requests")
+
+            self.queued += 1
+            try:
+                timeout = None if deadline is None else deadline - time.monotonic()
+                await asyncio.wait_for(self._semaphore.acquire(), timeout)
+            except asyncio.TimeoutError:
+                self.expired += 1
+                raise DeadlineExceeded("Deadline passed while queued")
+            finally:
+                self.queued -= 1
+
+        self.admitted += 1
+        self.inflight += 1
+        try:
+            yield
+        finally:
+            self.inflight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_inflight": self.max_inflight,
+            "max_queue": self.max_queue,
+            "inflight": self.inflight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "expired": self.expired
+        }
+
+def request_deadline(timeout_ms: int | None) -> float:
+    """Absolute monotonic deadline from the client's budget, capped at REQUEST_DEADLINE_MS."""
+    budget_ms = REQUEST_DEADLINE_MS if timeout_ms is None else min(timeout_ms, REQUEST_DEADLINE_MS)
+    return time.monotonic() + max(budget_ms, 0) / 1000
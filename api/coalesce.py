@@ -0,0 +1,68 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Hashable
+
+from api.admission import DeadlineExceeded
+
+class Flight:
+    def __init__(self):
+        self.task: asyncio.Task | None = None
+        self.waiters: list = []
+
+class SingleFlight:
+    """Shares one in-flight computation between concurrent callers with the same key.
+
+    The first caller for a key starts the computation; callers arriving while
+    it runs await the same task and get the same result or the same
+    exception. The task is shielded so one waiter timing out or being
+    cancelled never cancels it for the others.
+
+    Each waiter gives up at its own deadline. The shared work gets its own
+    deadline, work_timeout seconds after it starts, so a short budget on
+    the caller that happened to start it never fails the other waiters.
+    """
+
+    def __init__(self, work_timeout: float | None = None):
+        self.work_timeout = work_timeout
+        self._flights: dict[Hashable, Flight] = {}
+        self.leaders = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    async def do(self, key: Hashable, fn: Callable[[list, float | None], Awaitable[Any]],
+                 waiter: Any = None, deadline: float | None = None):
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = Flight()
+            self._flights[key] = flight
+            self.leaders += 1
+            work_deadline = None if self.work_timeout is None else time.monotonic() + self.work_timeout
+            # fn sees the live waiter list, e.g. to skip work nobody is waiting for
+            flight.task = asyncio.ensure_future(fn(flight.waiters, work_deadline))
+            flight.task.add_done_callback(lambda task: self._finish(key, flight, task))
+        else:
+            self.coalesced += 1
+
+        flight.waiters.append(waiter)
+        try:
+            timeout = None if deadline is None else deadline - time.monotonic()
+            return await asyncio.wait_for(asyncio.shield(flight.task), timeout)
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("Deadline passed while waiting for a shared computation")
+        finally:
+            flight.waiters.remove(waiter)
+
+    def _finish(self, key: Hashable, flight: Flight, task: asyncio.Task):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Mark the exception retrieved even if every waiter already gave up
+        if not task.cancelled() and task.exception() is not None:
+            self.failures += 1
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "failures": self.failures
+        }
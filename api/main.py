@@ -1,20 +1,98 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Header, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 import logging
 import contextlib
+import asyncio
+import os
+import time
 
-from Experiments.rag import get_balanced_recommendations, ingest_data, collection
+from Experiments.rag import (
+    get_balanced_recommendations,
+    recommend_from_index,
+    hold_index,
+    registry,
+    normalize_query,
+    ingest_data,
+    reload_index,
+    index_stats,
+    start_catalog_watcher,
+    engine_fingerprint,
+    PartialRecommendations,
+)
+from Experiments.jd_fetch import is_url
+from Experiments.catalogs import UnknownCatalog
+from api.admission import (
+    AdmissionController,
+    Overloaded,
+    DeadlineExceeded,
+    request_deadline,
+    REQUEST_DEADLINE_MS,
+    RETRY_AFTER_SECONDS,
+)
+from api.coalesce import SingleFlight
+from api.query_log import QueryLog, top_logged_queries, WARMUP_TOP_N
+from api.serialization import (
+    RecommendationResponse,
+    parse_fields,
+    format_assessment,
+    choose_encoding,
+    make_etag,
+    etag_matches,
+    not_modified,
+    json_response,
+)
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+CATALOG_WATCH_INTERVAL = float(os.getenv("CATALOG_WATCH_INTERVAL", "0"))
+TOP_K = 10
+
+admission = AdmissionController()
+# Shared runs are bounded by the server-wide cap, never by one waiter's budget
+single_flight = SingleFlight(work_timeout=REQUEST_DEADLINE_MS / 1000)
+query_log = QueryLog()
+
+warmup_status = {
+    "ready": False,
+    "queries": 0,
+    "seconds": None
+}
+
+def warm_up_caches():
+    """Replay the most frequent logged queries so popular ones are hot after a deploy."""
+    started = time.perf_counter()
+    try:
+        queries = [q for q in top_logged_queries(WARMUP_TOP_N, catalog_id=registry.default_id) if not is_url(q)]
+        for query in queries:
+            try:
+                get_balanced_recommendations(query, top_k=TOP_K)
+                warmup_status["queries"] += 1
+            except Exception as e:
+                logger.warning(f"Warm-up query failed: {e}")
+        logger.info(f"Warmed caches with {warmup_status['queries']} logged queries")
+    except Exception as e:
+        # Warm-up is best effort; a broken log must not keep /ready at 503
+        logger.exception(f"Cache warm-up aborted: {e}")
+    finally:
+        warmup_status["seconds"] = round(time.perf_counter() - started, 3)
+        warmup_status["ready"] = True
 
 @contextlib.asynccontextmanager
 async def lifespan(app: FastAPI):
-    logger.info("Checking Vector DB status...")
-    if collection.count() == 0:
-        logger.info("Vector DB is empty. Ingesting data...")
-        ingest_data()
-        logger.info("Data ingestion complete.")
-    else:
-        logger.info("Vector DB already populated.")
+    logger.info("Building vector index for the catalog...")
+    count = ingest_data()
+    logger.info(f"Vector index ready with {count} items.")
+    if CATALOG_WATCH_INTERVAL > 0:
+        start_catalog_watcher(CATALOG_WATCH_INTERVAL)
+        logger.info(f"Watching catalog for changes every {CATALOG_WATCH_INTERVAL}s")
+    query_log.start()
+    # Warm-up runs after startup so /health answers while /ready waits for it
+    warmup_task = asyncio.create_task(run_in_threadpool(warm_up_caches))
     yield
+    query_log.stop()
+    if not warmup_task.done():
+        warmup_task.cancel()
 
 app = FastAPI(
     title="SHL Assessment Recommender API",
@@ -27,18 +105,7 @@ logger = logging.getLogger("shl-api")
 
 class QueryRequest(BaseModel):
     query: str
-
-class Assessment(BaseModel):
-    url: str
-    name: str
-    description: str
-    duration: int | None
-    test_type: str | list | None 
-    adaptive_support: bool | str | None 
-    remote_support: bool | str | None
-
-class RecommendationResponse(BaseModel):
-    recommended_assessments: list[Assessment]
+    catalog_id: str | None = None
 
 @app.get("/health")
 async def health_check():
@@ -47,36 +114,167 @@ async def health_check():
         "service": "shl-assessment-recommender"
     }
 
+@app.get("/ready")
+async def readiness_check():
+    if not warmup_status["ready"]:
+        return JSONResponse(status_code=503, content={"status": "warming up", **warmup_status})
+    return {"status": "ready", **warmup_status}
+
+@app.get("/stats")
+async def stats():
+    return {
+        **index_stats(),
+        "admission": admission.stats(),
+        "coalescing": single_flight.stats(),
+        "query_log": query_log.stats(),
+        "warmup": warmup_status
+    }
+
+def retry_later_error(detail: str, status_code: int = 503) -> HTTPException:
+    return HTTPException(
+        status_code=status_code,
+        detail=detail,
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+    )
+
+async def all_disconnected(waiters: list) -> bool:
+    for waiter in waiters:
+        if not await waiter.is_disconnected():
+            return False
+    return True
+
+async def run_recommendation(http_request: Request, index, query: str, deadline: float):
+    async def compute(waiters: list, work_deadline: float | None):
+        # The shared work may outlive the request that started it, so it
+        # keeps its own hold on the index.
+        with hold_index(index):
+            return await admitted_compute(waiters, work_deadline)
+
+    async def admitted_compute(waiters: list, work_deadline: float | None):
+        async with admission.admit(work_deadline):
+            # Clients that disconnected or gave up while queued no longer need the answer
+            if await all_disconnected(waiters):
+                raise DeadlineExceeded("All clients disconnected while queued")
+            # The pipeline is CPU bound; keep it off the event loop so admission
+            # decisions and health checks stay fast under load.
+            return await run_in_threadpool(recommend_from_index, index, query, TOP_K, work_deadline)
+
+    # Identical concurrent queries share one pipeline run (and one admission
+    # slot); each waiter still answers 504 at its own deadline.
+    key = (index.version, normalize_query(query), TOP_K)
+    return await single_flight.do(key, compute, waiter=http_request, deadline=deadline)
+
+def check_admin_token(token: str | None):
+    # Without a configured token the admin endpoints do not exist: an open
+    # forced reload would let anyone trigger a full re-embed
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/reload")
+async def reload_state(x_admin_token: str | None = Header(default=None)):
+    check_admin_token(x_admin_token)
+    return index_stats()
+
+@app.post("/admin/reload", status_code=202)
+async def trigger_reload(
+    background_tasks: BackgroundTasks,
+    force: bool = False,
+    catalog: str | None = None,
+    x_admin_token: str | None = Header(default=None)
+):
+    check_admin_token(x_admin_token)
+    try:
+        status = registry.reload_status(catalog)
+    except UnknownCatalog as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    if status["state"] == "running":
+        raise HTTPException(status_code=409, detail="Catalog reload already in progress")
+
+    # The new index is built off the request path and swapped in atomically;
+    # requests already running keep using the index they started with.
+    background_tasks.add_task(reload_index, force, catalog)
+    logger.info(f"Reload of catalog '{catalog or registry.default_id}' scheduled")
+    return {
+        "status": "reload scheduled",
+        "catalog": catalog or registry.default_id,
+        "force": force,
+        "current_version": status["last_version"]
+    }
+
+async def checkout_index(catalog_id: str | None):
+    index = registry.checkout_loaded(catalog_id)
+    if index is not None:
+        return index
+    # A lazy load embeds a whole catalog; keep it off the event loop
+    return await run_in_threadpool(registry.checkout, catalog_id)
+
 @app.post("/recommend", response_model=RecommendationResponse)
-async def recommend(request: QueryRequest):
+async def recommend(
+    request: QueryRequest,
+    http_request: Request,
+    fields: str | None = None,
+    accept_encoding: str | None = Header(default=None),
+    if_none_match: str | None = Header(default=None),
+    x_request_timeout_ms: int | None = Header(default=None)
+):
+    started = time.perf_counter()
+    deadline = request_deadline(x_request_timeout_ms)
     if not request.query.strip():
         raise HTTPException(status_code=400, detail="Query cannot be empty")
 
+    try:
+        selected_fields = parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
         logger.info(f"Received query: {request.query[:100]}")
 
-        recommendations = get_balanced_recommendations(
+        encoding = choose_encoding(accept_encoding)
+        index = await checkout_index(request.catalog_id)
+        try:
+            version = f"{index.version}:{engine_fingerprint()}"
+            etag = make_etag(normalize_query(request.query), TOP_K, selected_fields, version, encoding)
+            if etag_matches(if_none_match, etag):
+                logger.info("ETag matched, returning 304")
+                return not_modified(etag)
+
+            recommendations = await run_recommendation(http_request, index, request.query, deadline)
+        finally:
+            registry.release(index)
+
+        formatted = [format_assessment(rec, selected_fields) for rec in recommendations]
+
+        logger.info(f"Returning {len(formatted)} recommendations")
+        query_log.record(
             request.query,
-            top_k=10
+            (time.perf_counter() - started) * 1000,
+            [rec.get("url") for rec in recommendations],
+            catalog_id=request.catalog_id or registry.default_id
         )
 
-        formatted = []
-        for rec in recommendations:
-            formatted.append({
-                "url": rec.get("url"),
-                "name": rec.get("name"),
-                "description": rec.get("description"),
-                "duration": str(rec.get("duration")),
-                "test_type": rec.get("test_type"),
-                "adaptive_support": rec.get("adaptive_support"),
-                "remote_support": rec.get("remote_support"),
-            })
+        # An empty list is what the pipeline returns when the JD fetch or the
+        # vector search fails, and partial results come from a reranker budget
+        # fallback; never let clients revalidate either as current.
+        if not recommendations or isinstance(recommendations, PartialRecommendations):
+            etag = None
 
-        logger.info(f"Returning {len(formatted)} recommendations")
+        # Returning a Response directly skips FastAPI's response_model
+        # re-validation; response_model still documents the schema.
+        return json_response({"recommended_assessments": formatted}, etag=etag, encoding=encoding)
+
+    except UnknownCatalog as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+    except Overloaded as e:
+        logger.warning(f"Shedding request: {e}")
+        raise retry_later_error("Server is overloaded, retry later")
 
-        return {
-            "recommended_assessments": formatted
-        }
+    except DeadlineExceeded as e:
+        logger.warning(f"Dropping request: {e}")
+        raise retry_later_error("Request deadline exceeded", status_code=504)
 
     except Exception as e:
         logger.error(f"Recommendation failed: {str(e)}") 
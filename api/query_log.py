@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import queue
+import random
+import threading
+import time
+from collections import Counter
+
+from Experiments.normalize import normalize_query
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+QUERY_LOG_PATH = os.getenv("QUERY_LOG_PATH", os.path.join(BASE_DIR, "logs", "queries.jsonl"))
+QUERY_LOG_SAMPLE_RATE = float(os.getenv("QUERY_LOG_SAMPLE_RATE", "0.2"))
+QUERY_LOG_BUFFER = int(os.getenv("QUERY_LOG_BUFFER", "1000"))
+QUERY_LOG_MAX_BYTES = int(os.getenv("QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+QUERY_LOG_BACKUPS = int(os.getenv("QUERY_LOG_BACKUPS", "3"))
+WARMUP_TOP_N = int(os.getenv("WARMUP_TOP_N", "50"))
+
+_STOP = object()
+
+class QueryLog:
+    """Sampled JSONL log of /recommend traffic written by a background thread.
+
+    record() never blocks the request: entries go into a bounded queue and
+    are dropped (and counted) when the writer falls behind. The file is
+    rotated to path.1 .. path.N once it grows past max_bytes.
+    """
+
+    def __init__(self, path: str = QUERY_LOG_PATH, sample_rate: float = QUERY_LOG_SAMPLE_RATE,
+                 buffer_size: int = QUERY_LOG_BUFFER, max_bytes: int = QUERY_LOG_MAX_BYTES,
+                 backups: int = QUERY_LOG_BACKUPS):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._queue = queue.Queue(maxsize=buffer_size)
+        self._thread = None
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def start(self):
+        if self.sample_rate <= 0 or self._thread is not None:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="query-log", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+        self._thread = None
+
+    def record(self, query: str, latency_ms: float, urls: list, catalog_id: str = None):
+        if self._thread is None or random.random() >= self.sample_rate:
+            return
+        normalized = normalize_query(query)
+        entry = {
+            "ts": round(time.time(), 3),
+            "query_hash": hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16],
+            "query": normalized,
+            "catalog_id": catalog_id,
+            "latency_ms": round(latency_ms, 1),
+            "urls": urls
+        }
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            # Drain whatever else is waiting so each write is one syscall-sized batch
+            while len(batch) < 256:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                stopping = True
+                batch = [entry for entry in batch if entry is not _STOP]
+            if batch:
+                self._write(batch)
+
+    def _write(self, batch: list):
+        try:
+            self._rotate_if_needed()
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in batch))
+            self.written += len(batch)
+        except OSError as e:
+            self.errors += 1
+            print(f"Query log write failed: {e}")
+
+    def _rotate_if_needed(self):
+        try:
+            if os.path.getsize(self.path) < self.max_bytes:
+                return
+        except OSError:
+            return
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def stats(self) -> dict:
+        return {
+            "path": self.path,
+            "sample_rate": self.sample_rate,
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "errors": self.errors
+        }
+
+def top_logged_queries(n: int = WARMUP_TOP_N, catalog_id: str = None, path: str = QUERY_LOG_PATH,
+                       backups: int = QUERY_LOG_BACKUPS) -> list:
+    """Most frequent normalized queries across the current and rotated log files.
+
+    With catalog_id, only queries logged for that catalog (or before catalogs
+    were logged) are counted.
+    """
+    counts = Counter()
+    for candidate in [path] + [f"{path}.{i}" for i in range(1, backups + 1)]:
+        if not os.path.exists(candidate):
+            continue
+        # A crash can leave a line cut mid-character; skip it rather than fail
+        with open(candidate, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    query = entry.get("query")
+                except (ValueError, AttributeError):
+                    continue
+                if catalog_id and entry.get("catalog_id", catalog_id) not in (catalog_id, None):
+                    continue
+                if query:
+                    counts[query] += 1
+    return [query for query, _ in counts.most_common(n)]
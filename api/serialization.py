@@ -0,0 +1,123 @@
+import gzip
+import hashlib
+import json
+import os
+
+from fastapi import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed; the framing overhead is not worth it
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+
+ASSESSMENT_FIELDS = (
+    "url",
+    "name",
+    "description",
+    "duration",
+    "test_type",
+    "adaptive_support",
+    "remote_support",
+)
+
+class Assessment(BaseModel):
+    url: str
+    name: str
+    description: str
+    duration: int | None
+    test_type: str | list | None
+    adaptive_support: bool | str | None
+    remote_support: bool | str | None
+
+class RecommendationResponse(BaseModel):
+    recommended_assessments: list[Assessment]
+
+def parse_fields(fields: str | None) -> tuple:
+    if not fields:
+        return ASSESSMENT_FIELDS
+    selected = tuple(f.strip() for f in fields.split(",") if f.strip())
+    unknown = [f for f in selected if f not in ASSESSMENT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return selected or ASSESSMENT_FIELDS
+
+def format_assessment(rec: dict, fields: tuple = ASSESSMENT_FIELDS) -> dict:
+    # The pipeline already produces Assessment-shaped dicts, so the fast path
+    # only projects and coerces instead of validating every field again.
+    formatted = {}
+    for field in fields:
+        value = rec.get(field)
+        if field == "duration" and value is not None:
+            value = int(value)
+        formatted[field] = value
+    return formatted
+
+def dumps(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def choose_encoding(accept_encoding: str | None) -> str | None:
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+def compress(body: bytes, encoding: str | None) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+def make_etag(query: str, top_k: int, fields: tuple, catalog_version: str, encoding: str | None) -> str:
+    # Strong validator: the same normalized query against the same catalog
+    # version and engine settings (the caller folds both into catalog_version)
+    # always yields byte-identical output for a given encoding.
+    key = "\x1f".join([catalog_version, str(top_k), ",".join(fields), encoding or "identity", query])
+    return '"' + hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in candidates or f"W/{etag}" in candidates
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Vary": "Accept-Encoding"})
+
+def json_response(payload, etag: str | None = None, encoding: str | None = None) -> Response:
+    body = dumps(payload)
+    headers = {"Vary": "Accept-Encoding"}
+    if etag:
+        headers["ETag"] = etag
+        headers["Cache-Control"] = "no-cache"
+    if encoding and len(body) >= COMPRESSION_MIN_BYTES:
+        body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Tests import the top-level packages (api, Client, Experiments) from the repo root
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
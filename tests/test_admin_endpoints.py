@@ -0,0 +1,46 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("chromadb")
+pytest.importorskip("sentence_transformers")
+
+from fastapi.testclient import TestClient
+
+from api import main
+
+@pytest.fixture
+def client(monkeypatch):
+    reloads = []
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(main, "reload_index", lambda force, catalog: reloads.append((force, catalog)))
+    # Without the context manager the lifespan (and the catalog build) does not run
+    test_client = TestClient(main.app)
+    test_client.reloads = reloads
+    return test_client
+
+def test_reload_state_requires_token(client):
+    assert client.get("/admin/reload").status_code == 403
+    assert client.get("/admin/reload", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+def test_reload_state_returns_index_stats(client):
+    response = client.get("/admin/reload", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 200
+    assert "catalogs" in response.json()
+
+def test_trigger_reload_schedules_rebuild(client):
+    response = client.post("/admin/reload?force=true", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 202
+    assert response.json()["force"] is True
+    assert client.reloads == [(True, None)]
+
+def test_trigger_reload_unknown_catalog(client):
+    response = client.post("/admin/reload?catalog=nope", headers={"X-Admin-Token": "secret"})
+    assert response.status_code == 404
+    assert client.reloads == []
+
+def test_admin_endpoints_disabled_without_token(client, monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", None)
+    assert client.get("/admin/reload").status_code == 404
+    assert client.post("/admin/reload?force=true").status_code == 404
+    assert client.reloads == []
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+import pytest
+
+from api.admission import AdmissionController, DeadlineExceeded, Overloaded, request_deadline
+
+async def hold_slot(admission, started, release):
+    async with admission.admit():
+        started.set()
+        await release.wait()
+
+def test_requests_beyond_queue_cap_are_rejected():
+    async def scenario():
+        admission = AdmissionController(max_inflight=1, max_queue=1)
+        started, release = asyncio.Event(), asyncio.Event()
+        holder = asyncio.create_task(hold_slot(admission, started, release))
+        await started.wait()
+
+        queued = asyncio.create_task(hold_slot(admission, asyncio.Event(), release))
+        await asyncio.sleep(0)
+        assert admission.queued == 1
+
+        with pytest.raises(Overloaded):
+            async with admission.admit():
+                pass
+
+        release.set()
+        await asyncio.gather(holder, queued)
+        return admission.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["admitted"] == 2
+    assert stats["rejected"] == 1
+    assert stats["inflight"] == 0 and stats["queued"] == 0
+
+def test_simultaneous_arrivals_respect_queue_cap():
+    async def scenario():
+        admission = AdmissionController(max_inflight=2, max_queue=1)
+        release = asyncio.Event()
+
+        async def request():
+            try:
+                async with admission.admit():
+                    await release.wait()
+                return "ok"
+            except Overloaded:
+                return "rejected"
+
+        tasks = [asyncio.create_task(request()) for _ in range(6)]
+        await asyncio.sleep(0.01)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    results = asyncio.run(scenario())
+    assert results.count("ok") == 3
+    assert results.count("rejected") == 3
+
+def test_queued_request_expires_at_deadline():
+    async def scenario():
+        admission = AdmissionController(max_inflight=1, max_queue=4)
+        started, release = asyncio.Event(), asyncio.Event()
+        holder = asyncio.create_task(hold_slot(admission, started, release))
+        await started.wait()
+
+        began = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            async with admission.admit(deadline=time.monotonic() + 0.05):
+                pass
+        waited = time.monotonic() - began
+
+        release.set()
+        await holder
+        return admission.stats(), waited
+
+    stats, waited = asyncio.run(scenario())
+    assert 0.04 <= waited < 1.0
+    assert stats["expired"] == 1
+    assert stats["queued"] == 0 and stats["inflight"] == 0
+
+def test_past_deadline_is_refused_before_admission():
+    async def scenario():
+        admission = AdmissionController(max_inflight=1, max_queue=1)
+        with pytest.raises(DeadlineExceeded):
+            async with admission.admit(deadline=time.monotonic() - 1):
+                pass
+        return admission.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["expired"] == 1 and stats["admitted"] == 0
+
+def test_request_deadline_is_capped(monkeypatch):
+    monkeypatch.setattr("api.admission.REQUEST_DEADLINE_MS", 1000)
+    now = time.monotonic()
+    assert request_deadline(None) - now == pytest.approx(1.0, abs=0.05)
+    assert request_deadline(60000) - now == pytest.approx(1.0, abs=0.05)
+    assert request_deadline(200) - now == pytest.approx(0.2, abs=0.05)
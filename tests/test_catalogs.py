@@ -0,0 +1,118 @@
+import pytest
+
+from Experiments.catalogs import CatalogEntry, CatalogRegistry, UnknownCatalog
+
+class FakeIndex:
+    def __init__(self, catalog_id, version, size):
+        self.catalog_id = catalog_id
+        self.version = version
+        self.size = size
+        self.active_requests = 0
+        self.closed = False
+        self.close_calls = 0
+
+    def memory_bytes(self):
+        return self.size
+
+    def close(self):
+        self.close_calls += 1
+
+    def info(self):
+        return {'version': self.version}
+
+def make_registry(tmp_path, budget=250, sizes=None):
+    sizes = sizes or {}
+    versions = {}
+    entries = {}
+    for catalog_id in ("a", "b", "c"):
+        path = tmp_path / f"{catalog_id}.json"
+        path.write_text("[]")
+        entries[catalog_id] = CatalogEntry(catalog_id, str(path))
+        versions[str(path)] = "v1"
+
+    built = []
+
+    def build(entry):
+        index = FakeIndex(entry.id, versions[entry.data_path], sizes.get(entry.id, 100))
+        built.append(index)
+        return index
+
+    registry = CatalogRegistry(entries, build_fn=build, version_fn=lambda path: versions[path],
+                               memory_budget_bytes=budget, default_id="a")
+    return registry, built, versions
+
+def test_lazy_load_builds_once(tmp_path):
+    registry, built, _ = make_registry(tmp_path)
+    assert registry.checkout_loaded("b") is None
+
+    with registry.acquire("b") as index:
+        assert index.active_requests == 1
+    with registry.acquire("b") as again:
+        assert again is index
+    assert len(built) == 1
+    assert registry.stats()['catalogs']['b']['misses'] == 1
+    assert registry.stats()['catalogs']['b']['hits'] == 1
+
+def test_checkout_loaded_pins_without_building(tmp_path):
+    registry, built, _ = make_registry(tmp_path)
+    with registry.acquire("a"):
+        pass
+    index = registry.checkout_loaded("a")
+    assert index is built[0] and index.active_requests == 1
+    registry.release(index)
+    assert len(built) == 1
+
+def test_unknown_catalog(tmp_path):
+    registry, _, _ = make_registry(tmp_path)
+    with pytest.raises(UnknownCatalog):
+        registry.checkout("missing")
+
+def test_least_recently_used_catalog_is_evicted_over_budget(tmp_path):
+    registry, built, _ = make_registry(tmp_path, budget=250)
+    for catalog_id in ("a", "b", "a", "c"):
+        with registry.acquire(catalog_id):
+            pass
+
+    stats = registry.stats()
+    assert stats['loaded_lru_order'] == ["a", "c"]
+    assert stats['catalogs']['b']['evictions'] == 1
+    evicted = built[1]
+    assert evicted.catalog_id == "b" and evicted.closed and evicted.close_calls == 1
+
+def test_evicted_index_in_use_is_closed_on_last_release(tmp_path):
+    registry, built, _ = make_registry(tmp_path, budget=150)
+    in_use = registry.checkout("a")
+    with registry.acquire("b"):
+        pass
+
+    assert not registry.is_loaded("a")
+    assert not in_use.closed and in_use.close_calls == 0
+    registry.release(in_use)
+    assert in_use.closed and in_use.close_calls == 1
+
+def test_reload_swaps_and_retires_old_index(tmp_path):
+    registry, built, versions = make_registry(tmp_path)
+    old = registry.checkout("a")
+
+    assert registry.reload("a")['reloads'] == 0  # unchanged version is skipped
+    versions[registry._slot("a").entry.data_path] = "v2"
+    status = registry.reload("a")
+    assert status['last_version'] == "v2" and status['state'] == 'idle'
+
+    with registry.acquire("a") as current:
+        assert current.version == "v2"
+    assert not old.closed
+    registry.release(old)
+    assert old.closed
+
+def test_hold_refuses_closed_index(tmp_path):
+    registry, built, versions = make_registry(tmp_path)
+    with registry.acquire("a") as index:
+        pass
+    versions[registry._slot("a").entry.data_path] = "v2"
+    registry.reload("a")
+
+    assert index.closed
+    with pytest.raises(RuntimeError):
+        with registry.hold(index):
+            pass
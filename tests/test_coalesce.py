@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+import pytest
+
+from api.coalesce import SingleFlight
+from Experiments.deadlines import DeadlineExceeded, check_deadline
+
+def test_concurrent_callers_share_one_computation():
+    calls = []
+
+    async def scenario():
+        single_flight = SingleFlight()
+
+        async def compute(waiters, deadline):
+            calls.append(len(waiters))
+            await asyncio.sleep(0.01)
+            return ["result"]
+
+        results = await asyncio.gather(*[single_flight.do("q", compute, waiter=i) for i in range(3)])
+        return results, single_flight.stats()
+
+    results, stats = asyncio.run(scenario())
+    assert results == [["result"]] * 3
+    assert len(calls) == 1
+    assert stats["leaders"] == 1 and stats["coalesced"] == 2 and stats["in_flight"] == 0
+
+def test_errors_are_shared_and_not_cached():
+    calls = []
+
+    async def scenario():
+        single_flight = SingleFlight()
+
+        async def failing(waiters, deadline):
+            calls.append("failing")
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(
+            *[single_flight.do("q", failing, waiter=i) for i in range(2)],
+            return_exceptions=True
+        )
+
+        async def succeeding(waiters, deadline):
+            calls.append("succeeding")
+            return "ok"
+
+        retry = await single_flight.do("q", succeeding)
+        return results, retry, single_flight.stats()
+
+    results, retry, stats = asyncio.run(scenario())
+    assert all(isinstance(result, ValueError) for result in results)
+    assert retry == "ok"
+    assert calls == ["failing", "succeeding"]
+    assert stats["failures"] == 1
+
+def test_waiter_deadline_does_not_cancel_shared_work():
+    async def scenario():
+        single_flight = SingleFlight()
+
+        async def compute(waiters, deadline):
+            await asyncio.sleep(0.1)
+            return "done"
+
+        impatient = single_flight.do("q", compute, waiter="a", deadline=time.monotonic() + 0.02)
+        patient = single_flight.do("q", compute, waiter="b")
+        return await asyncio.gather(impatient, patient, return_exceptions=True)
+
+    impatient, patient = asyncio.run(scenario())
+    assert isinstance(impatient, DeadlineExceeded)
+    assert patient == "done"
+
+def test_short_leader_deadline_does_not_fail_followers():
+    seen_deadlines = []
+
+    async def scenario():
+        single_flight = SingleFlight(work_timeout=1.0)
+
+        async def compute(waiters, deadline):
+            # Honours its deadline like the pipeline does between stages
+            seen_deadlines.append(deadline)
+            await asyncio.sleep(0.05)
+            check_deadline(deadline, "finishing")
+            return "done"
+
+        started = time.monotonic()
+        leader = single_flight.do("q", compute, waiter="a", deadline=started + 0.01)
+        follower = single_flight.do("q", compute, waiter="b", deadline=started + 1.0)
+        return started, await asyncio.gather(leader, follower, return_exceptions=True)
+
+    started, (leader, follower) = asyncio.run(scenario())
+    assert isinstance(leader, DeadlineExceeded)
+    assert follower == "done"
+    assert seen_deadlines[0] >= started + 1.0
@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from Experiments.dedupe import collapse_clusters, name_groups, name_key
+
+def test_name_key_strips_levels_versions_and_tags():
+    assert name_key("Core Java (Advanced Level) (New)") == "core java"
+    assert name_key("Core Java (Entry Level) (New)") == "core java"
+    assert name_key("Report 2.0") == name_key("Report 1.0")
+    assert name_key("Business Communications") == name_key("Business Communication")
+
+def test_name_groups_only_returns_shared_keys():
+    names = ["Core Java (Entry Level)", "Python", "Core Java (Advanced Level)", "SQL"]
+    assert name_groups(names) == [[0, 2]]
+
+def test_collapse_ranks_siblings_after_every_cluster():
+    candidates = [
+        (90.0, {'url': 'java-advanced', 'cluster_id': 1}),
+        (80.0, {'url': 'java-entry', 'cluster_id': 1}),
+        (70.0, {'url': 'python', 'cluster_id': 2}),
+        (60.0, {'url': 'sql'}),
+        (50.0, {'url': 'java-intermediate', 'cluster_id': 1}),
+    ]
+    collapsed = collapse_clusters(candidates)
+    assert [c['url'] for _, c in collapsed] == ['java-advanced', 'python', 'sql', 'java-entry', 'java-intermediate']
+    # Siblings must stay behind when balance_recommendations re-sorts by score
+    assert sorted(collapsed, key=lambda x: x[0], reverse=True) == collapsed
+
+def test_collapse_without_duplicates_is_unchanged():
+    candidates = [(3.0, {'url': 'a'}), (2.0, {'url': 'b'}), (1.0, {'url': 'c'})]
+    assert collapse_clusters(candidates) == candidates
@@ -0,0 +1,78 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("bs4")
+
+from Experiments import jd_fetch
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1/jd",
+    "http://localhost:8000/admin",
+    "http://10.1.2.3/jd",
+    "http://192.168.0.10/jd",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://[::1]/jd",
+    "http://[::ffff:127.0.0.1]/jd",
+    "ftp://93.184.216.34/jd",
+])
+def test_internal_urls_are_refused(url):
+    with pytest.raises(jd_fetch.BlockedURL):
+        jd_fetch.check_public_url(url)
+
+def test_public_address_is_allowed():
+    jd_fetch.check_public_url("http://93.184.216.34/jd")
+
+class FakeRedirect:
+    is_redirect = True
+    headers = {"Location": "http://169.254.169.254/latest/meta-data/"}
+
+    def close(self):
+        pass
+
+def test_redirect_to_internal_address_is_refused(monkeypatch):
+    requested = []
+
+    def fake_get(url, **kwargs):
+        requested.append(url)
+        return FakeRedirect()
+
+    monkeypatch.setattr(jd_fetch._session, "get", fake_get)
+    monkeypatch.setattr(jd_fetch, "JD_CACHE_DIR", "/nonexistent")
+    with pytest.raises(jd_fetch.BlockedURL):
+        jd_fetch.fetch_jd_text("http://93.184.216.34/jd")
+    assert requested == ["http://93.184.216.34/jd"]
+
+def test_cache_is_pruned_to_max_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(jd_fetch, "JD_CACHE_DIR", str(tmp_path))
+    now = time.time()
+    for i in range(5):
+        path = tmp_path / f"{i}.txt"
+        path.write_text("jd")
+        os.utime(path, (now - 100 + i, now - 100 + i))
+
+    jd_fetch._prune_cache(max_files=2)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["3.txt", "4.txt"]
+
+def test_cache_prunes_expired_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(jd_fetch, "JD_CACHE_DIR", str(tmp_path))
+    stale = tmp_path / "stale.txt"
+    stale.write_text("jd")
+    old = time.time() - jd_fetch.JD_CACHE_TTL - 10
+    os.utime(stale, (old, old))
+    (tmp_path / "fresh.txt").write_text("jd")
+
+    jd_fetch._prune_cache()
+    assert [p.name for p in tmp_path.iterdir()] == ["fresh.txt"]
+
+def test_cache_expires_in_follows_the_cached_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(jd_fetch, "JD_CACHE_DIR", str(tmp_path))
+    url = "https://host/jobs/AbC"
+    assert jd_fetch.cache_expires_in(url) == jd_fetch.JD_CACHE_TTL
+
+    jd_fetch._write_cache(url, "jd")
+    aged = time.time() - jd_fetch.JD_CACHE_TTL + 60
+    os.utime(jd_fetch._cache_path(url), (aged, aged))
+    assert 0 < jd_fetch.cache_expires_in(url) <= 60
@@ -0,0 +1,9 @@
+from Experiments.normalize import is_url, normalize_query
+
+def test_text_queries_are_case_and_whitespace_insensitive():
+    assert normalize_query("  Java   Developer\n40 mins ") == normalize_query("java developer 40 MINS")
+
+def test_url_queries_are_kept_verbatim():
+    assert is_url(" HTTPS://host/jobs/AbC ")
+    assert normalize_query("  https://host/jobs/AbC?id=X1 ") == "https://host/jobs/AbC?id=X1"
+    assert normalize_query("https://host/jobs/AbC") != normalize_query("https://host/jobs/abc")
@@ -0,0 +1,56 @@
+import json
+import os
+
+from api.query_log import QueryLog, top_logged_queries
+
+def write_log(log, queries, catalog_id="shl"):
+    log.start()
+    for query in queries:
+        log.record(query, 12.5, ["https://example.com/a"], catalog_id=catalog_id)
+    log.stop()
+
+def test_entries_are_normalized_and_written(tmp_path):
+    path = str(tmp_path / "queries.jsonl")
+    log = QueryLog(path=path, sample_rate=1.0)
+    write_log(log, ["  Java   Developer ", "python"])
+
+    with open(path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f]
+    assert [entry["query"] for entry in entries] == ["java developer", "python"]
+    assert entries[0]["catalog_id"] == "shl"
+    assert log.stats()["written"] == 2
+
+def test_log_rotates_and_keeps_backups(tmp_path):
+    path = str(tmp_path / "queries.jsonl")
+    log = QueryLog(path=path, sample_rate=1.0, max_bytes=1, backups=2)
+    for query in ["first", "second", "third", "fourth"]:
+        write_log(log, [query])
+
+    assert os.path.exists(path)
+    assert os.path.exists(f"{path}.1") and os.path.exists(f"{path}.2")
+    assert not os.path.exists(f"{path}.3")
+    assert set(top_logged_queries(10, path=path, backups=2)) == {"second", "third", "fourth"}
+
+def test_top_queries_count_across_files_and_filter_catalog(tmp_path):
+    path = str(tmp_path / "queries.jsonl")
+    log = QueryLog(path=path, sample_rate=1.0)
+    write_log(log, ["java", "java", "sql"])
+    write_log(log, ["sales", "sales", "sales"], catalog_id="other")
+
+    assert top_logged_queries(2, path=path) == ["sales", "java"]
+    assert top_logged_queries(5, catalog_id="shl", path=path) == ["java", "sql"]
+
+def test_truncated_line_is_skipped(tmp_path):
+    path = tmp_path / "queries.jsonl"
+    line = json.dumps({"query": "java", "catalog_id": "shl"}) + "\n"
+    # Ends inside the two-byte "é", as a crash mid-write would leave it
+    cut = '{"query": "dé'.encode("utf-8")[:-1]
+    path.write_bytes(line.encode("utf-8") * 2 + cut)
+
+    assert top_logged_queries(5, path=str(path)) == ["java"]
+
+def test_unsampled_log_writes_nothing(tmp_path):
+    path = str(tmp_path / "queries.jsonl")
+    log = QueryLog(path=path, sample_rate=0)
+    write_log(log, ["java"])
+    assert not os.path.exists(path)
@@ -0,0 +1,85 @@
+import time
+
+from Experiments.reranker import CrossEncoderReranker
+
+class DictCache:
+    def __init__(self):
+        self._data = {}
+
+    def get(self, key):
+        return self._data.get(key)
+
+    def put(self, key, value):
+        self._data[key] = value
+
+    def stats(self):
+        return {'size': len(self._data)}
+
+class FakeModel:
+    """Scores pairs by candidate text length, sleeping `pair_seconds` per pair."""
+
+    def __init__(self, pair_seconds: float = 0.0):
+        self.pair_seconds = pair_seconds
+        self.batches = []
+
+    def predict(self, pairs, batch_size=None, show_progress_bar=False):
+        self.batches.append(len(pairs))
+        time.sleep(self.pair_seconds * len(pairs))
+        return [float(len(text)) for _, text in pairs]
+
+def make_reranker(model, **kwargs):
+    reranker = CrossEncoderReranker(DictCache(), **kwargs)
+    reranker._model = model
+    return reranker
+
+def candidates(n):
+    # First-stage order puts the shortest names (lowest fake score) first
+    return [(100.0 - i, {'url': f"u{i}", 'name': "x" * (i + 1), 'description': ''}) for i in range(n)]
+
+def test_complete_rerank_reorders_head_and_keeps_tail():
+    reranker = make_reranker(FakeModel(), top_n=4, budget_ms=1000, batch_size=2)
+    reranked, complete = reranker.rerank("q", "h", candidates(6))
+    assert complete
+    assert [c['url'] for _, c in reranked] == ["u3", "u2", "u1", "u0", "u4", "u5"]
+    assert reranked[0][0] > reranked[-1][0]
+    assert reranker.fallbacks == 0 and reranker.pairs_scored == 4
+
+def test_predicted_overrun_skips_the_batch():
+    model = FakeModel(pair_seconds=0.01)
+    reranker = make_reranker(model, top_n=4, budget_ms=30, batch_size=2)
+    # One measured pair costs ~10ms, so a second batch of two cannot fit in 30ms
+    reranker.pair_seconds = 0.01
+    original = candidates(4)
+    result, complete = reranker.rerank("q", "h", original)
+    assert not complete
+    assert result == original
+    assert model.batches == [2]
+    assert reranker.fallbacks == 1
+
+def test_overrunning_batch_is_discarded_but_cached():
+    model = FakeModel(pair_seconds=0.02)
+    reranker = make_reranker(model, top_n=2, budget_ms=10, batch_size=2)
+    original = candidates(3)
+    result, complete = reranker.rerank("q", "h", original)
+    assert not complete
+    assert result == original
+    assert reranker.pair_seconds is not None
+
+    # The scores survived, so a retry finishes without calling the model
+    model.pair_seconds = 0.0
+    result, complete = reranker.rerank("q", "h", original)
+    assert complete
+    assert model.batches == [2]
+    assert [c['url'] for _, c in result] == ["u1", "u0", "u2"]
+
+def test_calibration_applies_the_budget_to_the_first_request():
+    model = FakeModel(pair_seconds=0.01)
+    reranker = make_reranker(model, top_n=4, budget_ms=20, batch_size=4)
+    reranker.calibrate()
+    assert reranker.pair_seconds >= 0.01
+    calibration_batches = list(model.batches)
+
+    # A batch of four is expected to take ~40ms, so it never starts
+    result, complete = reranker.rerank("q", "h", candidates(4))
+    assert not complete
+    assert model.batches == calibration_batches
@@ -0,0 +1,32 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("pydantic")
+
+from api.serialization import ASSESSMENT_FIELDS, etag_matches, make_etag, parse_fields
+
+def test_parse_fields_defaults_to_all():
+    assert parse_fields(None) == ASSESSMENT_FIELDS
+    assert parse_fields(" , ") == ASSESSMENT_FIELDS
+
+def test_parse_fields_keeps_order_and_rejects_unknown():
+    assert parse_fields("url, name") == ("url", "name")
+    with pytest.raises(ValueError):
+        parse_fields("url,secret")
+
+def test_etag_depends_on_every_input():
+    base = make_etag("java developer", 10, ("url",), "v1:engine", "gzip")
+    assert base == make_etag("java developer", 10, ("url",), "v1:engine", "gzip")
+    assert base != make_etag("java developer", 10, ("url",), "v1:other-engine", "gzip")
+    assert base != make_etag("java developer", 10, ("url",), "v2:engine", "gzip")
+    assert base != make_etag("java developer", 10, ("url", "name"), "v1:engine", "gzip")
+    assert base != make_etag("java developer", 10, ("url",), "v1:engine", None)
+
+def test_etag_matches():
+    etag = make_etag("q", 10, ("url",), "v1", None)
+    assert not etag_matches(None, etag)
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", {etag}', etag)
+    assert etag_matches(f"W/{etag}", etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches('"other"', etag)
@@ -0,0 +1,16 @@
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("chromadb")
+pytest.importorskip("sentence_transformers")
+
+from api import main
+
+def test_unreadable_log_still_marks_ready(monkeypatch):
+    def broken_log(*args, **kwargs):
+        raise UnicodeDecodeError("utf-8", b"\xc3", 0, 1, "unexpected end of data")
+
+    monkeypatch.setattr(main, "top_logged_queries", broken_log)
+    monkeypatch.setitem(main.warmup_status, "ready", False)
+    main.warm_up_caches()
+    assert main.warmup_status["ready"] is True